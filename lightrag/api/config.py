@@ -74,16 +74,17 @@ def get_default_host(binding_type: str) -> str:
     )  # fallback to ollama if unknown
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     """
     Parse command line arguments with environment variable fallback
 
     Args:
-        is_uvicorn_mode: Whether running under uvicorn mode
+        argv: Arguments to parse instead of sys.argv[1:]
 
     Returns:
         argparse.Namespace: Parsed arguments
     """
+    cli_args = sys.argv[1:] if argv is None else argv
 
     parser = argparse.ArgumentParser(description="LightRAG API Server")
 
@@ -276,23 +277,23 @@ def parse_args() -> argparse.Namespace:
     # Conditionally add binding options defined in binding_options module
     # This will add command line arguments for all binding options (e.g., --ollama-embedding-num_ctx)
     # and corresponding environment variables (e.g., OLLAMA_EMBEDDING_NUM_CTX)
-    if "--llm-binding" in sys.argv:
+    if "--llm-binding" in cli_args:
         try:
-            idx = sys.argv.index("--llm-binding")
-            if idx + 1 < len(sys.argv) and sys.argv[idx + 1] == "ollama":
+            idx = cli_args.index("--llm-binding")
+            if idx + 1 < len(cli_args) and cli_args[idx + 1] == "ollama":
                 OllamaLLMOptions.add_args(parser)
         except IndexError:
             pass
     elif os.environ.get("LLM_BINDING") == "ollama":
         OllamaLLMOptions.add_args(parser)
 
-    if "--embedding-binding" in sys.argv:
+    if "--embedding-binding" in cli_args:
         try:
-            idx = sys.argv.index("--embedding-binding")
-            if idx + 1 < len(sys.argv):
-                if sys.argv[idx + 1] == "ollama":
+            idx = cli_args.index("--embedding-binding")
+            if idx + 1 < len(cli_args):
+                if cli_args[idx + 1] == "ollama":
                     OllamaEmbeddingOptions.add_args(parser)
-                elif sys.argv[idx + 1] == "gemini":
+                elif cli_args[idx + 1] == "gemini":
                     GeminiEmbeddingOptions.add_args(parser)
         except IndexError:
             pass
@@ -304,10 +305,10 @@ def parse_args() -> argparse.Namespace:
             GeminiEmbeddingOptions.add_args(parser)
 
     # Add OpenAI LLM options when llm-binding is openai or azure_openai
-    if "--llm-binding" in sys.argv:
+    if "--llm-binding" in cli_args:
         try:
-            idx = sys.argv.index("--llm-binding")
-            if idx + 1 < len(sys.argv) and sys.argv[idx + 1] in [
+            idx = cli_args.index("--llm-binding")
+            if idx + 1 < len(cli_args) and cli_args[idx + 1] in [
                 "openai",
                 "azure_openai",
             ]:
@@ -317,17 +318,17 @@ def parse_args() -> argparse.Namespace:
     elif os.environ.get("LLM_BINDING") in ["openai", "azure_openai"]:
         OpenAILLMOptions.add_args(parser)
 
-    if "--llm-binding" in sys.argv:
+    if "--llm-binding" in cli_args:
         try:
-            idx = sys.argv.index("--llm-binding")
-            if idx + 1 < len(sys.argv) and sys.argv[idx + 1] == "gemini":
+            idx = cli_args.index("--llm-binding")
+            if idx + 1 < len(cli_args) and cli_args[idx + 1] == "gemini":
                 GeminiLLMOptions.add_args(parser)
         except IndexError:
             pass
     elif os.environ.get("LLM_BINDING") == "gemini":
         GeminiLLMOptions.add_args(parser)
 
-    args = parser.parse_args()
+    args = parser.parse_args(cli_args)
 
     # convert relative path to absolute path
     args.working_dir = os.path.abspath(args.working_dir)
@@ -467,6 +468,19 @@ def parse_args() -> argparse.Namespace:
     return args
 
 
+def get_config_from_env() -> argparse.Namespace:
+    """Build the configuration from environment variables and defaults only
+
+    Unlike get_config(), this never reads or mutates sys.argv and does not
+    initialize the global configuration, so library callers and scripts
+    with their own command line can reuse the server settings.
+
+    Returns:
+        argparse.Namespace: The configured arguments
+    """
+    return parse_args([])
+
+
 def update_uvicorn_mode_config():
     # If in uvicorn mode and workers > 1, force it to 1 and log warning
     if global_args.workers > 1:
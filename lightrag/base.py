@@ -594,6 +594,28 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             edge_data: A dictionary of edge properties
         """
 
+    async def upsert_nodes_batch(self, nodes: list[tuple[str, dict[str, str]]]) -> None:
+        """Upsert nodes as a batch
+
+        Default implementation is a per-item fallback that calls upsert_node
+        for each entry. Storage backends that support batch writes (e.g. the
+        UNWIND query in PGGraphStorage) may override it.
+        """
+        for node_id, node_data in nodes:
+            await self.upsert_node(node_id, node_data)
+
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """Upsert edges as a batch
+
+        Default implementation is a per-item fallback that calls upsert_edge
+        for each entry. Storage backends that support batch writes (e.g. the
+        UNWIND query in PGGraphStorage) may override it.
+        """
+        for src_id, tgt_id, edge_data in edges:
+            await self.upsert_edge(src_id, tgt_id, edge_data)
+
     @abstractmethod
     async def delete_node(self, node_id: str) -> None:
         """Delete a node from the graph.
@@ -6,7 +6,7 @@ import re
 import datetime
 from datetime import timezone
 from dataclasses import dataclass, field
-from typing import Any, Awaitable, Callable, TypeVar, Union, final
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar, Union, final
 import numpy as np
 import configparser
 import ssl
@@ -2337,6 +2337,166 @@ class PGKVStorage(BaseKVStorage):
             return {"status": "error", "message": str(e)}
 
 
+_UPSERT_TARGET_RE = re.compile(r"INSERT\s+INTO\s+(\S+)\s*\(([^)]*)\)", re.IGNORECASE)
+_COPY_STAGING_TABLE = "lightrag_vdb_copy_staging"
+_COPY_KEEP_ON_CONFLICT = ("workspace", "id", "create_time")
+
+
+@dataclass(frozen=True)
+class VectorCopyPlan:
+    """SQL needed to COPY a vector batch and merge it into its target table.
+
+    Built once per bulk load from `PGVectorStorage._upsert_statement`, so
+    batches only pay for packing values and streaming them.
+    """
+
+    table_name: str
+    columns: list[str]
+    create_staging_sql: str
+    merge_sql: str
+
+    @classmethod
+    def from_upsert_sql(cls, upsert_sql: str) -> "VectorCopyPlan":
+        match = _UPSERT_TARGET_RE.search(upsert_sql)
+        if match is None:
+            raise ValueError(
+                f"Cannot derive COPY columns from upsert SQL: {upsert_sql}"
+            )
+        table_name = match.group(1)
+        columns = [col.strip() for col in match.group(2).split(",") if col.strip()]
+
+        column_list = ", ".join(columns)
+        update_list = ",\n".join(
+            f"{col}=EXCLUDED.{col}"
+            for col in columns
+            if col not in _COPY_KEEP_ON_CONFLICT
+        )
+        return cls(
+            table_name=table_name,
+            columns=columns,
+            create_staging_sql=(
+                f"CREATE TEMP TABLE {_COPY_STAGING_TABLE} "
+                f"(LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ),
+            merge_sql=(
+                f"INSERT INTO {table_name} ({column_list})\n"
+                f"SELECT {column_list} FROM {_COPY_STAGING_TABLE}\n"
+                f"ON CONFLICT (workspace,id) DO UPDATE SET\n{update_list}"
+            ),
+        )
+
+
+async def copy_vector_values(
+    db: PostgreSQLDB, plan: VectorCopyPlan, batch_values: list[tuple[Any, ...]]
+) -> None:
+    """Bulk load a batch through COPY into a staging table, then merge it.
+
+    COPY streams the whole batch in asyncpg's binary format (vectors go through
+    the pgvector codec registered on every pool connection), and a single
+    INSERT ... SELECT ... ON CONFLICT keeps the upsert semantics of the
+    storage's upsert SQL.
+    """
+    id_idx = plan.columns.index("id")
+    workspace_idx = plan.columns.index("workspace")
+
+    # ON CONFLICT cannot touch the same row twice in one statement; keep the
+    # last occurrence of each id like the row-by-row executemany did.
+    records = list(
+        {(row[workspace_idx], row[id_idx]): row for row in batch_values}.values()
+    )
+
+    async def _copy_insert(connection):
+        async with connection.transaction():
+            await connection.execute(plan.create_staging_sql)
+            await connection.copy_records_to_table(
+                _COPY_STAGING_TABLE, records=records, columns=plan.columns
+            )
+            await connection.execute(plan.merge_sql)
+
+    await db._run_with_retry(_copy_insert)
+
+
+async def get_vector_column_type(vector_storage: "PGVectorStorage") -> str | None:
+    """Return the declared type of the storage table's `content_vector` column."""
+    row = await vector_storage.db.query(
+        """SELECT format_type(a.atttypid, a.atttypmod) AS column_type
+           FROM pg_attribute a
+           WHERE a.attrelid = to_regclass($1)
+             AND a.attname = 'content_vector'
+             AND NOT a.attisdropped""",
+        [vector_storage.table_name],
+    )
+    return row.get("column_type") if row else None
+
+
+async def get_vector_dtype(vector_storage: "PGVectorStorage") -> type[np.floating]:
+    """Return the numpy dtype to send for the storage's `content_vector` column.
+
+    A `halfvec(d)` column (pgvector 0.7+) stores float16, so upcasting vectors
+    to float32 would only double the bytes sent to Postgres. The pgvector codec
+    registered on pool connections encodes float16 arrays for halfvec in binary.
+    """
+    column_type = await get_vector_column_type(vector_storage)
+    if column_type and column_type.startswith("halfvec"):
+        logger.info(
+            "%s.content_vector is %s; writing vectors as float16",
+            vector_storage.table_name,
+            column_type,
+        )
+        return np.float16
+    return np.float32
+
+
+class BatchWritePipeline:
+    """Run batch writes in the background with a bounded number in flight.
+
+    The caller keeps building the next batch while earlier batches are being
+    written; `submit` blocks only when `max_inflight` writes are already
+    pending. The first write failure is re-raised on the next `submit` or on
+    `drain`, so callers stop producing work as soon as a write fails.
+    """
+
+    def __init__(self, max_inflight: int):
+        self.written = 0
+        self._sem = asyncio.Semaphore(max(1, max_inflight))
+        self._inflight: set[asyncio.Task] = set()
+        self._error: BaseException | None = None
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        self._sem.release()
+        if not task.cancelled() and task.exception() is not None:
+            self._error = self._error or task.exception()
+
+    async def _write(self, write: Coroutine[Any, Any, Any], size: int) -> None:
+        await write
+        self.written += size
+
+    async def submit(self, write: Coroutine[Any, Any, Any], size: int) -> None:
+        if self._error is not None:
+            write.close()
+            raise self._error
+        await self._sem.acquire()
+        if self._error is not None:
+            # A write failed while this one was waiting for a slot
+            self._sem.release()
+            write.close()
+            raise self._error
+        task = asyncio.create_task(self._write(write, size))
+        self._inflight.add(task)
+        task.add_done_callback(self._on_done)
+
+    async def drain(self) -> None:
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._error is not None:
+            raise self._error
+
+    def cancel(self) -> None:
+        for task in list(self._inflight):
+            task.cancel()
+
+
 @final
 @dataclass
 class PGVectorStorage(BaseVectorStorage):
@@ -2848,20 +3008,34 @@ class PGVectorStorage(BaseVectorStorage):
             await ClientManager.release_client(self.db)
             self.db = None
 
-    def _upsert_chunks(
-        self, item: dict[str, Any], current_time: datetime.datetime
-    ) -> tuple[str, tuple[Any, ...]]:
-        """Prepare upsert data for chunks.
+    def _upsert_statement(
+        self,
+    ) -> tuple[str, Callable[[dict[str, Any], datetime.datetime], tuple[Any, ...]]]:
+        """Return the upsert SQL for this namespace and its values builder.
+
+        The SQL is identical for every record of a namespace, so bulk callers
+        build it once and only pack a values tuple per record.
 
         Returns:
-            Tuple of (SQL template, values tuple for executemany)
+            Tuple of (SQL template, callable building the values tuple for executemany)
         """
+        if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
+            template, build_values = "upsert_chunk", self._chunk_values
+        elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
+            template, build_values = "upsert_entity", self._entity_values
+        elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
+            template, build_values = "upsert_relationship", self._relationship_values
+        else:
+            raise ValueError(f"{self.namespace} is not supported")
+        return SQL_TEMPLATES[template].format(table_name=self.table_name), build_values
+
+    def _chunk_values(
+        self, item: dict[str, Any], current_time: datetime.datetime
+    ) -> tuple[Any, ...]:
+        """Pack the upsert_chunk parameters for one chunk."""
         try:
-            upsert_sql = SQL_TEMPLATES["upsert_chunk"].format(
-                table_name=self.table_name
-            )
             # Return tuple in the exact order of SQL parameters ($1, $2, ...)
-            values: tuple[Any, ...] = (
+            return (
                 self.workspace,  # $1
                 item["__id__"],  # $2
                 item["tokens"],  # $3
@@ -2879,68 +3053,81 @@ class PGVectorStorage(BaseVectorStorage):
             )
             raise
 
-        return upsert_sql, values
-
-    def _upsert_entities(
-        self, item: dict[str, Any], current_time: datetime.datetime
-    ) -> tuple[str, tuple[Any, ...]]:
-        """Prepare upsert data for entities.
-
-        Returns:
-            Tuple of (SQL template, values tuple for executemany)
-        """
-        upsert_sql = SQL_TEMPLATES["upsert_entity"].format(table_name=self.table_name)
-        source_id = item["source_id"]
+    @staticmethod
+    def _source_id_to_chunk_ids(source_id: Any) -> list[Any]:
         if isinstance(source_id, str) and "<SEP>" in source_id:
-            chunk_ids = source_id.split("<SEP>")
-        else:
-            chunk_ids = [source_id]
+            return source_id.split("<SEP>")
+        return [source_id]
 
+    def _entity_values(
+        self, item: dict[str, Any], current_time: datetime.datetime
+    ) -> tuple[Any, ...]:
+        """Pack the upsert_entity parameters for one entity."""
         # Return tuple in the exact order of SQL parameters ($1, $2, ...)
-        values: tuple[Any, ...] = (
+        return (
             self.workspace,  # $1
             item["__id__"],  # $2
             item["entity_name"],  # $3
             item["content"],  # $4
             item["__vector__"],  # $5 - numpy array, handled by pgvector codec
-            chunk_ids,  # $6
+            self._source_id_to_chunk_ids(item["source_id"]),  # $6
             item.get("file_path", None),  # $7
             current_time,  # $8
             current_time,  # $9
         )
-        return upsert_sql, values
 
-    def _upsert_relationships(
+    def _relationship_values(
         self, item: dict[str, Any], current_time: datetime.datetime
-    ) -> tuple[str, tuple[Any, ...]]:
-        """Prepare upsert data for relationships.
-
-        Returns:
-            Tuple of (SQL template, values tuple for executemany)
-        """
-        upsert_sql = SQL_TEMPLATES["upsert_relationship"].format(
-            table_name=self.table_name
-        )
-        source_id = item["source_id"]
-        if isinstance(source_id, str) and "<SEP>" in source_id:
-            chunk_ids = source_id.split("<SEP>")
-        else:
-            chunk_ids = [source_id]
-
+    ) -> tuple[Any, ...]:
+        """Pack the upsert_relationship parameters for one relationship."""
         # Return tuple in the exact order of SQL parameters ($1, $2, ...)
-        values: tuple[Any, ...] = (
+        return (
             self.workspace,  # $1
             item["__id__"],  # $2
             item["src_id"],  # $3
             item["tgt_id"],  # $4
             item["content"],  # $5
             item["__vector__"],  # $6 - numpy array, handled by pgvector codec
-            chunk_ids,  # $7
+            self._source_id_to_chunk_ids(item["source_id"]),  # $7
             item.get("file_path", None),  # $8
             current_time,  # $9
             current_time,  # $10
         )
-        return upsert_sql, values
+
+    def _upsert_chunks(
+        self, item: dict[str, Any], current_time: datetime.datetime
+    ) -> tuple[str, tuple[Any, ...]]:
+        """Prepare upsert data for chunks.
+
+        Returns:
+            Tuple of (SQL template, values tuple for executemany)
+        """
+        upsert_sql = SQL_TEMPLATES["upsert_chunk"].format(table_name=self.table_name)
+        return upsert_sql, self._chunk_values(item, current_time)
+
+    def _upsert_entities(
+        self, item: dict[str, Any], current_time: datetime.datetime
+    ) -> tuple[str, tuple[Any, ...]]:
+        """Prepare upsert data for entities.
+
+        Returns:
+            Tuple of (SQL template, values tuple for executemany)
+        """
+        upsert_sql = SQL_TEMPLATES["upsert_entity"].format(table_name=self.table_name)
+        return upsert_sql, self._entity_values(item, current_time)
+
+    def _upsert_relationships(
+        self, item: dict[str, Any], current_time: datetime.datetime
+    ) -> tuple[str, tuple[Any, ...]]:
+        """Prepare upsert data for relationships.
+
+        Returns:
+            Tuple of (SQL template, values tuple for executemany)
+        """
+        upsert_sql = SQL_TEMPLATES["upsert_relationship"].format(
+            table_name=self.table_name
+        )
+        return upsert_sql, self._relationship_values(item, current_time)
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         logger.debug(f"[{self.workspace}] Inserting {len(data)} to {self.namespace}")
@@ -2969,21 +3156,11 @@ class PGVectorStorage(BaseVectorStorage):
         for i, d in enumerate(list_data):
             d["__vector__"] = embeddings[i]
 
-        # Prepare batch values for executemany
-        batch_values: list[tuple[Any, ...]] = []
-        upsert_sql = None
-
-        for item in list_data:
-            if is_namespace(self.namespace, NameSpace.VECTOR_STORE_CHUNKS):
-                upsert_sql, values = self._upsert_chunks(item, current_time)
-            elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
-                upsert_sql, values = self._upsert_entities(item, current_time)
-            elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
-                upsert_sql, values = self._upsert_relationships(item, current_time)
-            else:
-                raise ValueError(f"{self.namespace} is not supported")
-
-            batch_values.append(values)
+        # Prepare batch values for executemany; the SQL is shared by all rows
+        upsert_sql, build_values = self._upsert_statement()
+        batch_values: list[tuple[Any, ...]] = [
+            build_values(item, current_time) for item in list_data
+        ]
 
         # Use executemany for batch execution - significantly reduces DB round-trips
         # Note: register_vector is already called on pool init, no need to call it again
@@ -4203,6 +4380,16 @@ class PGGraphStorage(BaseGraphStorage):
 
         return d
 
+    @staticmethod
+    def _dollar_quote(s: str, tag_prefix: str = "AGE") -> str:
+        """Dollar-quote a string with a tag that does not occur inside it."""
+        s = "" if s is None else str(s)
+        for i in itertools.count(1):
+            tag = f"{tag_prefix}{i}"
+            wrapper = f"${tag}$"
+            if wrapper not in s:
+                return f"{wrapper}{s}{wrapper}"
+
     @staticmethod
     def _format_properties(
         properties: dict[str, Any], _id: Union[str, None] = None
@@ -4258,6 +4445,7 @@ class PGGraphStorage(BaseGraphStorage):
             else:
                 data = await self.db.execute(
                     query,
+                    data=params,
                     upsert=upsert,
                     with_age=True,
                     graph_name=self.graph_name,
@@ -4476,6 +4664,96 @@ class PGGraphStorage(BaseGraphStorage):
             )
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_nodes_batch(
+        self, nodes: list[tuple[str, dict[str, str]]], batch_size: int = 1000
+    ) -> None:
+        """
+        Upsert multiple nodes with one UNWIND ... MERGE query per batch.
+
+        Args:
+            nodes: List of (node_id, node_data) tuples
+            batch_size: Batch size for the query
+        """
+        for node_id, node_data in nodes:
+            if "entity_id" not in node_data:
+                raise ValueError(
+                    f"PostgreSQL: node properties must contain an 'entity_id' field: `{node_id}`"
+                )
+
+        cypher = """
+                 UNWIND $nodes AS node
+                 MERGE (n:base {entity_id: node.entity_id})
+                 SET n += node.props"""
+        sql = f"""
+            SELECT * FROM cypher({self._dollar_quote(self.graph_name)}::name,
+                                 {self._dollar_quote(cypher)}::cstring,
+                                 $1::agtype)
+              AS (n agtype)
+            """
+
+        for i in range(0, len(nodes), batch_size):
+            batch = [
+                {"entity_id": node_id, "props": node_data}
+                for node_id, node_data in nodes[i : i + batch_size]
+            ]
+            params = {"params": json.dumps({"nodes": batch}, ensure_ascii=False)}
+            try:
+                await self._query(sql, readonly=False, upsert=True, params=params)
+            except Exception:
+                logger.error(
+                    f"[{self.workspace}] POSTGRES, upsert_nodes_batch error on {len(batch)} nodes"
+                )
+                raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]], batch_size: int = 500
+    ) -> None:
+        """
+        Upsert multiple edges with one UNWIND ... MERGE query per batch.
+
+        Args:
+            edges: List of (source_node_id, target_node_id, edge_data) tuples
+            batch_size: Batch size for the query
+        """
+        cypher = """
+                 UNWIND $edges AS edge
+                 MATCH (source:base {entity_id: edge.src})
+                 WITH source, edge
+                 MATCH (target:base {entity_id: edge.tgt})
+                 MERGE (source)-[r:DIRECTED]-(target)
+                 SET r += edge.props
+                 SET r += edge.props"""
+        sql = f"""
+            SELECT * FROM cypher({self._dollar_quote(self.graph_name)}::name,
+                                 {self._dollar_quote(cypher)}::cstring,
+                                 $1::agtype)
+              AS (r agtype)
+            """
+
+        for i in range(0, len(edges), batch_size):
+            batch = [
+                {"src": src_id, "tgt": tgt_id, "props": edge_data}
+                for src_id, tgt_id, edge_data in edges[i : i + batch_size]
+            ]
+            params = {"params": json.dumps({"edges": batch}, ensure_ascii=False)}
+            try:
+                await self._query(sql, readonly=False, upsert=True, params=params)
+            except Exception:
+                logger.error(
+                    f"[{self.workspace}] POSTGRES, upsert_edges_batch error on {len(batch)} edges"
+                )
+                raise
+
     async def delete_node(self, node_id: str) -> None:
         """
         Delete a node from the graph.
@@ -4805,24 +5083,16 @@ class PGGraphStorage(BaseGraphStorage):
                          MATCH (a)<-[r]-(b)
                          RETURN src_eid AS source, tgt_eid AS target, properties(r) AS edge_properties"""
 
-            def dollar_quote(s: str, tag_prefix="AGE"):
-                s = "" if s is None else str(s)
-                for i in itertools.count(1):
-                    tag = f"{tag_prefix}{i}"
-                    wrapper = f"${tag}$"
-                    if wrapper not in s:
-                        return f"{wrapper}{s}{wrapper}"
-
             sql_fwd = f"""
-            SELECT * FROM cypher({dollar_quote(self.graph_name)}::name,
-                                 {dollar_quote(forward_cypher)}::cstring,
+            SELECT * FROM cypher({self._dollar_quote(self.graph_name)}::name,
+                                 {self._dollar_quote(forward_cypher)}::cstring,
                                  $1::agtype)
               AS (source text, target text, edge_properties agtype)
             """
 
             sql_bwd = f"""
-            SELECT * FROM cypher({dollar_quote(self.graph_name)}::name,
-                                 {dollar_quote(backward_cypher)}::cstring,
+            SELECT * FROM cypher({self._dollar_quote(self.graph_name)}::name,
+                                 {self._dollar_quote(backward_cypher)}::cstring,
                                  $1::agtype)
               AS (source text, target text, edge_properties agtype)
             """
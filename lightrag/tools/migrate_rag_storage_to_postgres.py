@@ -15,21 +15,69 @@ import asyncio
 import base64
 import datetime
 import json
+import logging
 import os
 import sys
 import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 from dataclasses import dataclass
+from functools import partial
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Coroutine, Iterable, Iterator
 
 import numpy as np
 import pipmaster as pm
 from dotenv import load_dotenv
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # orjson is an optional speedup for large KV files
+    orjson = None
+
 from lightrag.namespace import NameSpace
 from lightrag.utils import EmbeddingFunc, logger
 
+_DEFAULT_MAX_INFLIGHT = 4
+_DEFAULT_BATCH_SIZE = 500
+# Payload a vector batch aims for when --batch-size is not given: large
+# enough to amortize the per-batch staging table and merge, small enough to
+# keep several batches in flight without buffering much in memory.
+_TARGET_BATCH_BYTES = 4 * 1024 * 1024
+_MIN_VECTOR_BATCH_SIZE = 32
+_MAX_VECTOR_BATCH_SIZE = 5000
+_DECODE_MIN_SLICE = 64
+_DEFAULT_GRAPH_BATCH_SIZE = 1000
+_KV_STORES = (
+    (NameSpace.KV_STORE_FULL_DOCS, "full_docs"),
+    (NameSpace.KV_STORE_TEXT_CHUNKS, "text_chunks"),
+    (NameSpace.KV_STORE_FULL_ENTITIES, "full_entities"),
+    (NameSpace.KV_STORE_FULL_RELATIONS, "full_relations"),
+    (NameSpace.KV_STORE_ENTITY_CHUNKS, "entity_chunks"),
+    (NameSpace.KV_STORE_RELATION_CHUNKS, "relation_chunks"),
+    (NameSpace.KV_STORE_LLM_RESPONSE_CACHE, "llm_response_cache"),
+)
+
+
+# Record keys read in the per-record hot loops, kept in one place.
+_K_ID = sys.intern("__id__")
+_K_VECTOR = sys.intern("vector")
+_K_FULLDOC = sys.intern("full_doc_id")
+_K_CONTENT = sys.intern("content")
+_K_FILE = sys.intern("file_path")
+_K_SRC = sys.intern("src_id")
+_K_TGT = sys.intern("tgt_id")
+_K_SOURCE = sys.intern("source_id")
+_K_ENTITY = sys.intern("entity_name")
+
+# Reason codes returned by the vector decoders; each maps to a
+# `MigrationStats.skipped_<code>` counter.
+_SKIP_MISSING_ID = "missing_id"
+_SKIP_DECODE = "decode"
+_SKIP_DIM_MISMATCH = "dim_mismatch"
+
 
 @dataclass
 class MigrationStats:
@@ -37,56 +85,67 @@ class MigrationStats:
     total: int = 0
     inserted: int = 0
     skipped: int = 0
+    skipped_missing_id: int = 0
+    skipped_decode: int = 0
+    skipped_dim_mismatch: int = 0
+
+    def add_skips(self, reasons: Counter[str]):
+        for reason, count in reasons.items():
+            attr = f"skipped_{reason}"
+            setattr(self, attr, getattr(self, attr) + count)
+            self.skipped += count
 
     def log(self):
         logger.info(
-            "Migration %s: total=%s inserted=%s skipped=%s",
+            "Migration %s: total=%s inserted=%s skipped=%s "
+            "(missing_id=%s decode=%s dim_mismatch=%s)",
             self.name,
             self.total,
             self.inserted,
             self.skipped,
+            self.skipped_missing_id,
+            self.skipped_decode,
+            self.skipped_dim_mismatch,
         )
 
 
 def _load_json(path: Path) -> dict[str, Any]:
     try:
+        if orjson is not None:
+            return orjson.loads(path.read_bytes())
         with path.open("r", encoding="utf-8") as f:
             return json.load(f)
     except json.JSONDecodeError as exc:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError; the recovery
+        # streams the file with ijson, which accepts concatenated JSON values.
         logger.warning("JSON parse failed for %s (%s); retrying with streaming decode", path, exc)
-        content = path.read_text(encoding="utf-8")
-        decoder = json.JSONDecoder()
-        idx = 0
+        ijson = _ijson()
+        from ijson.common import JSONError  # type: ignore
+
         parsed_objects = 0
         last_obj: dict[str, Any] | None = None
 
-        while idx < len(content):
-            while idx < len(content) and content[idx].isspace():
-                idx += 1
-            if idx >= len(content):
-                break
+        with path.open("rb") as f:
             try:
-                obj, end = decoder.raw_decode(content, idx)
-            except json.JSONDecodeError as inner_exc:
-                if last_obj is not None:
-                    logger.warning(
-                        "Trailing JSON data ignored for %s (%s)",
-                        path,
-                        inner_exc,
-                    )
-                    break
-                raise
-            parsed_objects += 1
-            if isinstance(obj, dict):
-                last_obj = obj
-            else:
+                for obj in ijson.items(f, "", multiple_values=True, use_float=True):
+                    parsed_objects += 1
+                    if isinstance(obj, dict):
+                        last_obj = obj
+                    else:
+                        logger.warning(
+                            "Unexpected JSON root type in %s: %s",
+                            path,
+                            type(obj).__name__,
+                        )
+                        last_obj = None
+            except JSONError as inner_exc:
+                if last_obj is None:
+                    raise
                 logger.warning(
-                    "Unexpected JSON root type in %s: %s",
+                    "Trailing JSON data ignored for %s (%s)",
                     path,
-                    type(obj).__name__,
+                    inner_exc,
                 )
-                last_obj = None
-            idx = end
 
         if last_obj is None:
             raise exc
@@ -99,6 +158,34 @@ def _load_json(path: Path) -> dict[str, Any]:
         return last_obj
 
 
+def _ijson():
+    if not pm.is_installed("ijson"):
+        pm.install("ijson")
+    import ijson  # type: ignore
+
+    try:
+        return ijson.get_backend("yajl2_c")
+    except ImportError:
+        return ijson
+
+
+def _read_vdb_embedding_dim(path: Path) -> int | None:
+    """Read the top-level `embedding_dim` of a vdb file without loading `data`."""
+    ijson = _ijson()
+    with path.open("rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix == "embedding_dim" and event == "number":
+                return int(value)
+    return None
+
+
+def _iter_vdb_records(path: Path) -> Iterator[dict[str, Any]]:
+    """Stream the records of a vdb file's `data` array one at a time."""
+    ijson = _ijson()
+    with path.open("rb") as f:
+        yield from ijson.items(f, "data.item", use_float=True)
+
+
 def _batch_dict_items(
     data: dict[str, Any], batch_size: int
 ) -> Iterable[dict[str, Any]]:
@@ -112,39 +199,177 @@ def _batch_dict_items(
         yield batch
 
 
-def _decode_vector(encoded: Any, embedding_dim: int, record_id: str) -> np.ndarray | None:
+def _decode_vector(
+    encoded: Any, embedding_dim: int, record_id: str
+) -> tuple[np.ndarray | None, str | None]:
+    """Decode one vdb vector, returning `(vec, None)` or `(None, reason_code)`.
+
+    Per-record details only go to the debug log; callers aggregate the reason
+    codes and report them once per batch.
+    """
     if encoded is None:
-        return None
-    if isinstance(encoded, (list, tuple, np.ndarray)):
-        vec = np.array(encoded, dtype=np.float32)
+        return None, _SKIP_DECODE
+    if isinstance(encoded, np.ndarray):
+        vec = encoded.astype(np.float32, copy=False)
+    elif isinstance(encoded, (list, tuple)):
+        # fromiter skips the generic object-sequence conversion of np.array
+        vec = np.fromiter(encoded, dtype=np.float32, count=len(encoded))
     elif isinstance(encoded, str):
         try:
             compressed = base64.b64decode(encoded)
             raw = zlib.decompress(compressed)
             vec = np.frombuffer(raw, dtype=np.float16).astype(np.float32)
         except Exception as exc:
-            logger.warning("Failed to decode vector for %s: %s", record_id, exc)
-            return None
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Failed to decode vector for %s: %s", record_id, exc)
+            return None, _SKIP_DECODE
     else:
-        logger.warning("Unsupported vector type for %s: %s", record_id, type(encoded))
-        return None
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Unsupported vector type for %s: %s", record_id, type(encoded))
+        return None, _SKIP_DECODE
 
     if embedding_dim and len(vec) != embedding_dim:
-        logger.warning(
-            "Vector dim mismatch for %s: got %s expected %s",
-            record_id,
-            len(vec),
-            embedding_dim,
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Vector dim mismatch for %s: got %s expected %s",
+                record_id,
+                len(vec),
+                embedding_dim,
+            )
+        return None, _SKIP_DIM_MISMATCH
+    return vec, None
+
+
+def _batch_records(
+    records: Iterable[dict[str, Any]], batch_size: int
+) -> Iterator[list[dict[str, Any]]]:
+    batch: list[dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _adaptive_batch_size(
+    record: dict[str, Any], embedding_dim: int, dtype: type[np.floating]
+) -> int:
+    """Size vector batches so each one carries about `_TARGET_BATCH_BYTES`.
+
+    The row size is estimated from one sample record: the vector in its
+    column dtype plus the text fields that are copied alongside it.
+    """
+    text_bytes = sum(
+        len(value)
+        for key, value in record.items()
+        if key != _K_VECTOR and isinstance(value, str)
+    )
+    per_row = embedding_dim * np.dtype(dtype).itemsize + text_bytes
+    return min(
+        _MAX_VECTOR_BATCH_SIZE,
+        max(_MIN_VECTOR_BATCH_SIZE, _TARGET_BATCH_BYTES // per_row),
+    )
+
+
+def _decode_vectors_bulk(
+    records: list[dict[str, Any]],
+    embedding_dim: int,
+    dtype: type[np.floating] = np.float32,
+) -> tuple[list[dict[str, Any]], np.ndarray, Counter[str]]:
+    """Decode the vectors of a batch of vdb records into one `dtype` matrix.
+
+    Returns the records that carry an id and a valid vector, together with a
+    `(len(kept), embedding_dim)` matrix whose rows line up with them and a
+    count of skipped records per reason code. Each compressed fp16 vector is
+    written straight into its row of the matrix (upcast for float32, copied
+    as-is for float16) instead of allocating an intermediate array per record.
+
+    The matrix is big-endian: the pgvector binary codecs that COPY uses encode
+    each row with `np.asarray(value, dtype=">f4")` (`">f2"` for halfvec), so
+    swapping bytes here while filling the rows makes that per-row step a no-op
+    view instead of a second conversion.
+    """
+    out = np.empty(
+        (len(records), embedding_dim), dtype=np.dtype(dtype).newbyteorder(">")
+    )
+    kept: list[dict[str, Any]] = []
+    skips: Counter[str] = Counter()
+    for record in records:
+        record_id = record.get(_K_ID)
+        if not record_id:
+            skips[_SKIP_MISSING_ID] += 1
+            continue
+        encoded = record.get(_K_VECTOR)
+        if isinstance(encoded, str):
+            try:
+                vec = np.frombuffer(
+                    zlib.decompress(base64.b64decode(encoded)), dtype=np.float16
+                )
+            except Exception:
+                skips[_SKIP_DECODE] += 1
+                continue
+            if len(vec) != embedding_dim:
+                skips[_SKIP_DIM_MISMATCH] += 1
+                continue
+        else:
+            vec, reason = _decode_vector(encoded, embedding_dim, record_id)
+            if vec is None:
+                skips[reason] += 1
+                continue
+        out[len(kept)] = vec
+        kept.append(record)
+    return kept, out[: len(kept)], skips
+
+
+async def _decode_vectors_threaded(
+    records: list[dict[str, Any]],
+    embedding_dim: int,
+    dtype: type[np.floating] = np.float32,
+) -> tuple[list[dict[str, Any]], np.ndarray, Counter[str]]:
+    """Run `_decode_vectors_bulk` on slices of a batch in the default executor.
+
+    base64/zlib do their work in C, so slices decode in parallel worker threads
+    while the event loop keeps driving the in-flight Postgres writes.
+    """
+    loop = asyncio.get_running_loop()
+    workers = os.cpu_count() or 1
+    slice_size = max(_DECODE_MIN_SLICE, -(-len(records) // workers))
+    parts = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                None,
+                _decode_vectors_bulk,
+                records[i : i + slice_size],
+                embedding_dim,
+                dtype,
+            )
+            for i in range(0, len(records), slice_size)
         )
-        return None
-    return vec
+    )
+    if len(parts) == 1:
+        return parts[0]
+    kept = [record for part_kept, _, _ in parts for record in part_kept]
+    skips = sum((part_skips for _, _, part_skips in parts), Counter())
+    return kept, np.concatenate([vectors for _, vectors, _ in parts]), skips
 
 
-async def _migrate_kv_storage(storage, name: str, data: dict[str, Any], batch_size: int):
+async def _migrate_kv_storage(
+    storage,
+    name: str,
+    data: dict[str, Any],
+    batch_size: int,
+    max_inflight: int = _DEFAULT_MAX_INFLIGHT,
+):
+    from lightrag.kg.postgres_impl import BatchWritePipeline
+
     stats = MigrationStats(name=name, total=len(data))
+    pipeline = BatchWritePipeline(max_inflight)
     for batch in _batch_dict_items(data, batch_size):
-        await storage.upsert(batch)
-        stats.inserted += len(batch)
+        await pipeline.submit(storage.upsert(batch), len(batch))
+    await pipeline.drain()
+    stats.inserted = pipeline.written
     stats.log()
 
 
@@ -155,185 +380,288 @@ async def _migrate_doc_status(storage, data: dict[str, Any]):
     stats.log()
 
 
-async def _migrate_graph(storage, graphml_path: Path):
-    if not pm.is_installed("networkx"):
-        pm.install("networkx")
-    import networkx as nx  # type: ignore
+_GRAPHML_NS = "{http://graphml.graphdrawing.org/xmlns}"
+_GRAPHML_TYPES: dict[str, Any] = {
+    "boolean": lambda value: value.strip().lower() in ("true", "1"),
+    "int": int,
+    "long": int,
+    "float": float,
+    "double": float,
+    "string": str,
+}
+
+
+def _iter_graphml(
+    path: Path,
+) -> Iterator[tuple[str, str | None, dict[str, Any]]]:
+    """Stream nodes and edges out of a GraphML file.
+
+    Yields `(node_id, None, props)` for nodes and `(source, target, props)`
+    for edges, converting `<data>` values with the declared `<key>` types.
+    Like `nx.read_graphml`, `<default>` values are not applied to elements.
+    Elements are released as soon as they are consumed, so memory does not
+    grow with the size of the graph.
+    """
+    if not pm.is_installed("lxml"):
+        pm.install("lxml")
+    from lxml import etree  # type: ignore
+
+    keys: dict[str, tuple[str, Any]] = {}
+    key_tag = f"{_GRAPHML_NS}key"
+    node_tag = f"{_GRAPHML_NS}node"
+    edge_tag = f"{_GRAPHML_NS}edge"
+    data_tag = f"{_GRAPHML_NS}data"
+
+    for _, elem in etree.iterparse(
+        str(path), events=("end",), tag=(key_tag, node_tag, edge_tag)
+    ):
+        if elem.tag == key_tag:
+            keys[elem.get("id")] = (
+                elem.get("attr.name") or elem.get("id"),
+                _GRAPHML_TYPES.get(elem.get("attr.type", "string"), str),
+            )
+            continue
+
+        props: dict[str, Any] = {}
+        for data in elem.iterchildren(data_tag):
+            if data.text is None:
+                # Empty strings are written as <data/>; nx.read_graphml drops them
+                continue
+            name, cast = keys.get(data.get("key"), (data.get("key"), str))
+            props[name] = cast(data.text or "")
+
+        if elem.tag == node_tag:
+            yield elem.get("id"), None, props
+        else:
+            yield elem.get("source"), elem.get("target"), props
+
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def _take(items: Iterator[Any], count: int) -> list[Any]:
+    return list(islice(items, count))
 
+
+async def _migrate_graph(
+    storage, graphml_path: Path, batch_size: int = _DEFAULT_GRAPH_BATCH_SIZE
+):
     stats_nodes = MigrationStats(name="graph_nodes")
     stats_edges = MigrationStats(name="graph_edges")
 
-    graph = nx.read_graphml(graphml_path)
-    stats_nodes.total = graph.number_of_nodes()
-    stats_edges.total = graph.number_of_edges()
-
-    for node_id, node_data in graph.nodes(data=True):
-        node_props = dict(node_data)
-        node_props.setdefault("entity_id", node_id)
-        await storage.upsert_node(node_id, node_props)
-        stats_nodes.inserted += 1
+    nodes_batch: list[tuple[str, dict[str, Any]]] = []
+    edges_batch: list[tuple[str, str, dict[str, Any]]] = []
+
+    async def _flush_nodes():
+        nonlocal nodes_batch
+        if nodes_batch:
+            await storage.upsert_nodes_batch(nodes_batch)
+            stats_nodes.inserted += len(nodes_batch)
+            nodes_batch = []
+
+    async def _flush_edges():
+        nonlocal edges_batch
+        if edges_batch:
+            # Edges MATCH their endpoints, so pending nodes must land first
+            await _flush_nodes()
+            await storage.upsert_edges_batch(edges_batch)
+            stats_edges.inserted += len(edges_batch)
+            edges_batch = []
+
+    # GraphML parsing is CPU-bound, so chunks are pulled from the iterparse
+    # generator in the default executor. The next chunk is parsed while the
+    # current one is being written; only one thread touches the generator at
+    # a time because each chunk is awaited before the next is requested.
+    loop = asyncio.get_running_loop()
+    items = _iter_graphml(graphml_path)
+    pending = loop.run_in_executor(None, _take, items, batch_size)
+    while chunk := await pending:
+        pending = loop.run_in_executor(None, _take, items, batch_size)
+        for source_id, target_id, props in chunk:
+            if target_id is None:
+                stats_nodes.total += 1
+                props.setdefault("entity_id", source_id)
+                nodes_batch.append((source_id, props))
+                if len(nodes_batch) >= batch_size:
+                    await _flush_nodes()
+            else:
+                stats_edges.total += 1
+                edges_batch.append((source_id, target_id, props))
+                if len(edges_batch) >= batch_size:
+                    await _flush_edges()
 
-    for src_id, tgt_id, edge_data in graph.edges(data=True):
-        edge_props = dict(edge_data)
-        await storage.upsert_edge(src_id, tgt_id, edge_props)
-        stats_edges.inserted += 1
+    await _flush_nodes()
+    await _flush_edges()
 
     stats_nodes.log()
     stats_edges.log()
 
 
-async def _batch_vector_upsert(db, upsert_sql: str, batch_values: list[tuple[Any, ...]]):
-    async def _batch_insert(connection):
-        await connection.executemany(upsert_sql, batch_values)
+def _chunk_item(
+    record: dict[str, Any], vec: np.ndarray, text_chunks: dict[str, Any]
+) -> dict[str, Any]:
+    record_id = record[_K_ID]
+    chunk_meta = text_chunks.get(record_id, {})
+    return {
+        "__id__": record_id,
+        "tokens": chunk_meta.get("tokens"),
+        "chunk_order_index": chunk_meta.get("chunk_order_index"),
+        "full_doc_id": record.get(_K_FULLDOC),
+        "content": record.get(_K_CONTENT),
+        "file_path": record.get(_K_FILE) or chunk_meta.get("file_path"),
+        "__vector__": vec,
+    }
 
-    await db._run_with_retry(_batch_insert)
 
+def _entity_item(record: dict[str, Any], vec: np.ndarray) -> dict[str, Any]:
+    return {
+        "__id__": record[_K_ID],
+        "entity_name": record.get(_K_ENTITY),
+        "content": record.get(_K_CONTENT),
+        "source_id": record.get(_K_SOURCE, ""),
+        "file_path": record.get(_K_FILE),
+        "__vector__": vec,
+    }
 
-async def _migrate_vectors_chunks(
+
+def _relationship_item(record: dict[str, Any], vec: np.ndarray) -> dict[str, Any]:
+    src_id = record.get(_K_SRC)
+    tgt_id = record.get(_K_TGT)
+    content = record.get(_K_CONTENT)
+    if not content:
+        keywords = record.get("keywords") or ""
+        description = record.get("description") or ""
+        content = f"{keywords}\t{src_id}\n{tgt_id}\n{description}"
+
+    return {
+        "__id__": record[_K_ID],
+        "src_id": src_id,
+        "tgt_id": tgt_id,
+        "content": content,
+        "source_id": record.get(_K_SOURCE, ""),
+        "file_path": record.get(_K_FILE),
+        "__vector__": vec,
+    }
+
+
+async def _migrate_vectors(
+    name: str,
     vector_storage,
-    vdb_data: dict[str, Any],
-    text_chunks: dict[str, Any],
+    records: Iterable[dict[str, Any]],
+    build_item: Callable[[dict[str, Any], np.ndarray], dict[str, Any]],
     embedding_dim: int,
-    batch_size: int,
+    batch_size: int | None,
+    max_inflight: int,
 ):
-    stats = MigrationStats(name="vectors_chunks")
-    upsert_sql = None
-    batch_values: list[tuple[Any, ...]] = []
-    current_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    from lightrag.kg.postgres_impl import (
+        BatchWritePipeline,
+        VectorCopyPlan,
+        copy_vector_values,
+        get_vector_dtype,
+    )
 
-    for record in vdb_data.get("data", []):
-        stats.total += 1
-        record_id = record.get("__id__")
-        if not record_id:
-            stats.skipped += 1
-            continue
+    stats = MigrationStats(name=name)
+    pipeline = BatchWritePipeline(max_inflight)
+    dtype = await get_vector_dtype(vector_storage)
+    upsert_sql, build_values = vector_storage._upsert_statement()
+    plan = VectorCopyPlan.from_upsert_sql(upsert_sql)
+    current_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
 
-        vec = _decode_vector(record.get("vector"), embedding_dim, record_id)
-        if vec is None:
-            stats.skipped += 1
+    if batch_size is None:
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            stats.log()
+            return
+        batch_size = _adaptive_batch_size(first, embedding_dim, dtype)
+        logger.info("Migration %s: using batch size %s", name, batch_size)
+        records = chain((first,), records)
+
+    for batch in _batch_records(records, batch_size):
+        stats.total += len(batch)
+        kept, vectors, skips = await _decode_vectors_threaded(
+            batch, embedding_dim, dtype
+        )
+        if skips:
+            stats.add_skips(skips)
+            logger.warning(
+                "Migration %s: skipped %s of %s records in batch (%s)",
+                name,
+                sum(skips.values()),
+                len(batch),
+                ", ".join(f"{reason}={count}" for reason, count in skips.items()),
+            )
+        if not kept:
             continue
 
-        chunk_meta = text_chunks.get(record_id, {})
-        item = {
-            "__id__": record_id,
-            "tokens": chunk_meta.get("tokens"),
-            "chunk_order_index": chunk_meta.get("chunk_order_index"),
-            "full_doc_id": record.get("full_doc_id"),
-            "content": record.get("content"),
-            "file_path": record.get("file_path") or chunk_meta.get("file_path"),
-            "__vector__": vec,
-        }
-        upsert_sql, values = vector_storage._upsert_chunks(item, current_time)
-        batch_values.append(values)
-        if len(batch_values) >= batch_size:
-            await _batch_vector_upsert(vector_storage.db, upsert_sql, batch_values)
-            stats.inserted += len(batch_values)
-            batch_values = []
-
-    if batch_values and upsert_sql:
-        await _batch_vector_upsert(vector_storage.db, upsert_sql, batch_values)
-        stats.inserted += len(batch_values)
+        batch_values = [
+            build_values(build_item(record, vec), current_time)
+            for record, vec in zip(kept, vectors)
+        ]
+        await pipeline.submit(
+            copy_vector_values(vector_storage.db, plan, batch_values),
+            len(batch_values),
+        )
+    await pipeline.drain()
+    stats.inserted = pipeline.written
 
     stats.log()
 
 
-async def _migrate_vectors_entities(
+async def _migrate_vectors_chunks(
     vector_storage,
-    vdb_data: dict[str, Any],
+    records: Iterable[dict[str, Any]],
+    text_chunks: dict[str, Any],
     embedding_dim: int,
-    batch_size: int,
+    batch_size: int | None = None,
+    max_inflight: int = _DEFAULT_MAX_INFLIGHT,
 ):
-    stats = MigrationStats(name="vectors_entities")
-    upsert_sql = None
-    batch_values: list[tuple[Any, ...]] = []
-    current_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-
-    for record in vdb_data.get("data", []):
-        stats.total += 1
-        record_id = record.get("__id__")
-        if not record_id:
-            stats.skipped += 1
-            continue
-
-        vec = _decode_vector(record.get("vector"), embedding_dim, record_id)
-        if vec is None:
-            stats.skipped += 1
-            continue
+    await _migrate_vectors(
+        "vectors_chunks",
+        vector_storage,
+        records,
+        partial(_chunk_item, text_chunks=text_chunks),
+        embedding_dim,
+        batch_size,
+        max_inflight,
+    )
 
-        item = {
-            "__id__": record_id,
-            "entity_name": record.get("entity_name"),
-            "content": record.get("content"),
-            "source_id": record.get("source_id", ""),
-            "file_path": record.get("file_path"),
-            "__vector__": vec,
-        }
-        upsert_sql, values = vector_storage._upsert_entities(item, current_time)
-        batch_values.append(values)
-        if len(batch_values) >= batch_size:
-            await _batch_vector_upsert(vector_storage.db, upsert_sql, batch_values)
-            stats.inserted += len(batch_values)
-            batch_values = []
-
-    if batch_values and upsert_sql:
-        await _batch_vector_upsert(vector_storage.db, upsert_sql, batch_values)
-        stats.inserted += len(batch_values)
 
-    stats.log()
+async def _migrate_vectors_entities(
+    vector_storage,
+    records: Iterable[dict[str, Any]],
+    embedding_dim: int,
+    batch_size: int | None = None,
+    max_inflight: int = _DEFAULT_MAX_INFLIGHT,
+):
+    await _migrate_vectors(
+        "vectors_entities",
+        vector_storage,
+        records,
+        _entity_item,
+        embedding_dim,
+        batch_size,
+        max_inflight,
+    )
 
 
 async def _migrate_vectors_relationships(
     vector_storage,
-    vdb_data: dict[str, Any],
+    records: Iterable[dict[str, Any]],
     embedding_dim: int,
-    batch_size: int,
+    batch_size: int | None = None,
+    max_inflight: int = _DEFAULT_MAX_INFLIGHT,
 ):
-    stats = MigrationStats(name="vectors_relationships")
-    upsert_sql = None
-    batch_values: list[tuple[Any, ...]] = []
-    current_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-
-    for record in vdb_data.get("data", []):
-        stats.total += 1
-        record_id = record.get("__id__")
-        if not record_id:
-            stats.skipped += 1
-            continue
-
-        vec = _decode_vector(record.get("vector"), embedding_dim, record_id)
-        if vec is None:
-            stats.skipped += 1
-            continue
-
-        src_id = record.get("src_id")
-        tgt_id = record.get("tgt_id")
-        content = record.get("content")
-        if not content:
-            keywords = record.get("keywords") or ""
-            description = record.get("description") or ""
-            content = f"{keywords}\t{src_id}\n{tgt_id}\n{description}"
-
-        item = {
-            "__id__": record_id,
-            "src_id": src_id,
-            "tgt_id": tgt_id,
-            "content": content,
-            "source_id": record.get("source_id", ""),
-            "file_path": record.get("file_path"),
-            "__vector__": vec,
-        }
-        upsert_sql, values = vector_storage._upsert_relationships(item, current_time)
-        batch_values.append(values)
-        if len(batch_values) >= batch_size:
-            await _batch_vector_upsert(vector_storage.db, upsert_sql, batch_values)
-            stats.inserted += len(batch_values)
-            batch_values = []
-
-    if batch_values and upsert_sql:
-        await _batch_vector_upsert(vector_storage.db, upsert_sql, batch_values)
-        stats.inserted += len(batch_values)
-
-    stats.log()
+    await _migrate_vectors(
+        "vectors_relationships",
+        vector_storage,
+        records,
+        _relationship_item,
+        embedding_dim,
+        batch_size,
+        max_inflight,
+    )
 
 
 def _build_dummy_embedding_func(embedding_dim: int, model_name: str | None):
@@ -375,8 +703,17 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--batch-size",
         type=int,
-        default=500,
-        help="Batch size for vector inserts",
+        default=None,
+        help=(
+            f"Batch size for inserts (default: {_DEFAULT_BATCH_SIZE} for KV, "
+            "sized from the first record for vectors)"
+        ),
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=_DEFAULT_MAX_INFLIGHT,
+        help="Maximum number of batch writes in flight per storage",
     )
     parser.add_argument("--skip-kv", action="store_true", help="Skip KV storages")
     parser.add_argument(
@@ -389,6 +726,9 @@ def _parse_args() -> argparse.Namespace:
 
 async def _run_migration():
     args = _parse_args()
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count())
+    )
     source_dir = Path(args.source_dir)
     if not source_dir.exists():
         logger.error("Source dir not found: %s", source_dir)
@@ -417,10 +757,7 @@ async def _run_migration():
 
     embedding_dim = args.embedding_dim
     if not args.skip_vectors:
-        vdb_chunks_data = _load_json(vdb_chunks_path)
-        vdb_entities_data = _load_json(vdb_entities_path)
-        vdb_relationships_data = _load_json(vdb_relationships_path)
-        file_dim = vdb_chunks_data.get("embedding_dim")
+        file_dim = _read_vdb_embedding_dim(vdb_chunks_path)
         if embedding_dim is None:
             embedding_dim = file_dim
         if embedding_dim != file_dim:
@@ -431,18 +768,16 @@ async def _run_migration():
         if embedding_dim is None:
             logger.error("Embedding dimension is required for vector migration")
             return 2
-    else:
-        vdb_chunks_data = vdb_entities_data = vdb_relationships_data = {}
-        if embedding_dim is None:
-            env_dim = os.environ.get("EMBEDDING_DIM")
-            if env_dim:
-                embedding_dim = int(env_dim)
-            else:
-                embedding_dim = 1
-                logger.warning(
-                    "Embedding dim not provided; using %s for non-vector migration",
-                    embedding_dim,
-                )
+    elif embedding_dim is None:
+        env_dim = os.environ.get("EMBEDDING_DIM")
+        if env_dim:
+            embedding_dim = int(env_dim)
+        else:
+            embedding_dim = 1
+            logger.warning(
+                "Embedding dim not provided; using %s for non-vector migration",
+                embedding_dim,
+            )
 
     embedding_model = args.embedding_model
     if not embedding_model:
@@ -466,84 +801,46 @@ async def _run_migration():
 
     dummy_embedding = _build_dummy_embedding_func(embedding_dim, embedding_model)
 
+    # KV and vector migrations run concurrently, each with up to
+    # --max-inflight batch writes holding a pooled connection
+    concurrent_writers = (0 if args.skip_kv else len(_KV_STORES)) + (
+        0 if args.skip_vectors else 3
+    )
+    pool_size = concurrent_writers * args.max_inflight + 1
+    configured_pool_size = int(ClientManager.get_config()["max_connections"])
+    if configured_pool_size < pool_size:
+        logger.info(
+            "Raising POSTGRES_MAX_CONNECTIONS from %s to %s for concurrent migration",
+            configured_pool_size,
+            pool_size,
+        )
+        os.environ["POSTGRES_MAX_CONNECTIONS"] = str(pool_size)
+
     db = await ClientManager.get_client()
+    migrations: list[Coroutine[Any, Any, None]] = []
 
     if not args.skip_kv:
-        kv_full_docs = PGKVStorage(
-            namespace=NameSpace.KV_STORE_FULL_DOCS,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-        kv_text_chunks = PGKVStorage(
-            namespace=NameSpace.KV_STORE_TEXT_CHUNKS,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-        kv_full_entities = PGKVStorage(
-            namespace=NameSpace.KV_STORE_FULL_ENTITIES,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-        kv_full_relations = PGKVStorage(
-            namespace=NameSpace.KV_STORE_FULL_RELATIONS,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-        kv_entity_chunks = PGKVStorage(
-            namespace=NameSpace.KV_STORE_ENTITY_CHUNKS,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-        kv_relation_chunks = PGKVStorage(
-            namespace=NameSpace.KV_STORE_RELATION_CHUNKS,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-        kv_llm_cache = PGKVStorage(
-            namespace=NameSpace.KV_STORE_LLM_RESPONSE_CACHE,
-            workspace=workspace,
-            global_config=global_config,
-            embedding_func=dummy_embedding,
-            db=db,
-        )
-
-        full_docs = _load_json(source_dir / "kv_store_full_docs.json")
-        text_chunks = _load_json(source_dir / "kv_store_text_chunks.json")
-        full_entities = _load_json(source_dir / "kv_store_full_entities.json")
-        full_relations = _load_json(source_dir / "kv_store_full_relations.json")
-        entity_chunks = _load_json(source_dir / "kv_store_entity_chunks.json")
-        relation_chunks = _load_json(source_dir / "kv_store_relation_chunks.json")
-        llm_cache = _load_json(source_dir / "kv_store_llm_response_cache.json")
-
-        await _migrate_kv_storage(kv_full_docs, "full_docs", full_docs, args.batch_size)
-        await _migrate_kv_storage(
-            kv_text_chunks, "text_chunks", text_chunks, args.batch_size
-        )
-        await _migrate_kv_storage(
-            kv_full_entities, "full_entities", full_entities, args.batch_size
-        )
-        await _migrate_kv_storage(
-            kv_full_relations, "full_relations", full_relations, args.batch_size
-        )
-        await _migrate_kv_storage(
-            kv_entity_chunks, "entity_chunks", entity_chunks, args.batch_size
-        )
-        await _migrate_kv_storage(
-            kv_relation_chunks, "relation_chunks", relation_chunks, args.batch_size
-        )
-        await _migrate_kv_storage(kv_llm_cache, "llm_cache", llm_cache, args.batch_size)
+        text_chunks: dict[str, Any] = {}
+        for namespace, name in _KV_STORES:
+            storage = PGKVStorage(
+                namespace=namespace,
+                workspace=workspace,
+                global_config=global_config,
+                embedding_func=dummy_embedding,
+                db=db,
+            )
+            data = _load_json(source_dir / f"kv_store_{name}.json")
+            if name == "text_chunks":
+                text_chunks = data
+            migrations.append(
+                _migrate_kv_storage(
+                    storage,
+                    name,
+                    data,
+                    args.batch_size or _DEFAULT_BATCH_SIZE,
+                    args.max_inflight,
+                )
+            )
     else:
         text_chunks = _load_json(source_dir / "kv_store_text_chunks.json")
 
@@ -556,7 +853,7 @@ async def _run_migration():
         )
         await doc_status_storage.initialize()
         doc_status_data = _load_json(source_dir / "kv_store_doc_status.json")
-        await _migrate_doc_status(doc_status_storage, doc_status_data)
+        migrations.append(_migrate_doc_status(doc_status_storage, doc_status_data))
 
     if not args.skip_vectors:
         vectors_chunks = PGVectorStorage(
@@ -585,26 +882,38 @@ async def _run_migration():
         await vectors_entities.initialize()
         await vectors_relationships.initialize()
 
-        await _migrate_vectors_chunks(
-            vectors_chunks,
-            vdb_chunks_data,
-            text_chunks,
-            embedding_dim,
-            args.batch_size,
+        migrations.append(
+            _migrate_vectors_chunks(
+                vectors_chunks,
+                _iter_vdb_records(vdb_chunks_path),
+                text_chunks,
+                embedding_dim,
+                args.batch_size,
+                args.max_inflight,
+            )
         )
-        await _migrate_vectors_entities(
-            vectors_entities,
-            vdb_entities_data,
-            embedding_dim,
-            args.batch_size,
+        migrations.append(
+            _migrate_vectors_entities(
+                vectors_entities,
+                _iter_vdb_records(vdb_entities_path),
+                embedding_dim,
+                args.batch_size,
+                args.max_inflight,
+            )
         )
-        await _migrate_vectors_relationships(
-            vectors_relationships,
-            vdb_relationships_data,
-            embedding_dim,
-            args.batch_size,
+        migrations.append(
+            _migrate_vectors_relationships(
+                vectors_relationships,
+                _iter_vdb_records(vdb_relationships_path),
+                embedding_dim,
+                args.batch_size,
+                args.max_inflight,
+            )
         )
 
+    # KV, doc status and vector migrations write disjoint tables
+    await asyncio.gather(*migrations)
+
     if not args.skip_graph:
         graph_storage = PGGraphStorage(
             namespace=NameSpace.GRAPH_STORE_CHUNK_ENTITY_RELATION,
@@ -620,6 +929,13 @@ async def _run_migration():
 
 
 def main() -> int:
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     start = time.time()
     try:
         return asyncio.run(_run_migration())
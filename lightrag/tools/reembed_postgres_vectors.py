@@ -18,17 +18,31 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import datetime
+import hashlib
 import os
+import sqlite3
 import sys
 import time
-from dataclasses import dataclass
-from typing import Any, Iterable
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable
 
+import numpy as np
 from dotenv import load_dotenv
 
 from lightrag.namespace import NameSpace
 from lightrag.utils import EmbeddingFunc, logger
 
+if TYPE_CHECKING:
+    import asyncpg
+
+# Fetched pages buffered ahead of the embedding/upsert consumer
+_FETCH_QUEUE_SIZE = 2
+_DEFAULT_MAX_INFLIGHT = 4
+_DEFAULT_EMBED_CACHE_SIZE = 50_000
+_DEFAULT_MAX_BATCH_BYTES = 2 * 1024 * 1024
+
 
 @dataclass
 class ReembedStats:
@@ -36,16 +50,154 @@ class ReembedStats:
     total: int = 0
     processed: int = 0
     skipped: int = 0
+    reused: int = 0
 
     def log(self) -> None:
         logger.info(
-            "Re-embed %s: total=%s processed=%s skipped=%s",
+            "Re-embed %s: total=%s processed=%s skipped=%s reused=%s",
             self.name,
             self.total,
             self.processed,
             self.skipped,
+            self.reused,
+        )
+
+
+class _EmbeddingCache:
+    """Bounded LRU of embeddings keyed by a digest of the embedded text."""
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+
+    @staticmethod
+    def key(content: str) -> bytes:
+        return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        vec = self._entries.get(key)
+        if vec is not None:
+            self._entries.move_to_end(key)
+        return vec
+
+    def put(self, key: bytes, vec: np.ndarray) -> None:
+        if self._capacity <= 0:
+            return
+        self._entries[key] = vec
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+
+
+class _EmbeddingStore:
+    """SQLite file of embeddings that persists across runs.
+
+    Rows are keyed by target model, target dimension and `_EmbeddingCache.key`
+    digest, so a run with another `--target-dim` never reads vectors of the
+    old size. Vectors are stored as float16 blobs. Access is synchronous but
+    batched, one query per few hundred texts.
+    """
+
+    _LOOKUP_CHUNK = 500
+
+    def __init__(self, path: str, model: str, dim: int):
+        self._model = model
+        self._dim = dim
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb_dim "
+            "(model TEXT, dim INTEGER, hash BLOB, vector BLOB, "
+            "PRIMARY KEY (model, dim, hash))"
         )
 
+    def get_many(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        found: dict[bytes, np.ndarray] = {}
+        for i in range(0, len(keys), self._LOOKUP_CHUNK):
+            chunk = keys[i : i + self._LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                "SELECT hash, vector FROM emb_dim "
+                f"WHERE model=? AND dim=? AND hash IN ({placeholders})",
+                (self._model, self._dim, *chunk),
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float16)
+        return found
+
+    def put_many(self, vectors: Iterable[tuple[bytes, np.ndarray]]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO emb_dim VALUES (?, ?, ?, ?)",
+                (
+                    (self._model, self._dim, key, vec.astype(np.float16).tobytes())
+                    for key, vec in vectors
+                ),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class _RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for embedding calls.
+
+    One limiter is shared by every concurrent request of the run, so raising
+    --max-inflight or re-embedding tables in parallel fills the provider quota
+    without going past it. Waiters are served in arrival order.
+    """
+
+    def __init__(self, max_tpm: int | None, max_rpm: int | None):
+        self._requests = _TokenBucket(max_rpm) if max_rpm else None
+        self._tokens = _TokenBucket(max_tpm) if max_tpm else None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                for bucket, need in ((self._requests, 1), (self._tokens, tokens)):
+                    if bucket is None:
+                        continue
+                    bucket.refill(now)
+                    # A request larger than the bucket waits for a full bucket
+                    need = min(need, bucket.capacity)
+                    if bucket.level < need:
+                        wait = max(wait, (need - bucket.level) / bucket.rate)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            for bucket, need in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.level -= min(need, bucket.capacity)
+
+
+@dataclass
+class ReembedSettings:
+    """Per-run options shared by the table re-embed loops."""
+
+    batch_size: int
+    max_batch_bytes: int = _DEFAULT_MAX_BATCH_BYTES
+    max_inflight: int = _DEFAULT_MAX_INFLIGHT
+    cache: _EmbeddingCache = field(
+        default_factory=lambda: _EmbeddingCache(_DEFAULT_EMBED_CACHE_SIZE)
+    )
+    resume: bool = False
+    exact_count: bool = False
+    store: _EmbeddingStore | None = None
+
 
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -90,12 +242,111 @@ def _parse_args() -> argparse.Namespace:
         default=500,
         help="Batch size per upsert call",
     )
+    parser.add_argument(
+        "--max-batch-bytes",
+        type=int,
+        default=_DEFAULT_MAX_BATCH_BYTES,
+        help="Cut a batch early once its texts reach this many characters",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=_DEFAULT_MAX_INFLIGHT,
+        help="Upsert batches (embedding requests) in flight per table",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=int,
+        default=None,
+        help="Embedding tokens per minute across all requests (estimated)",
+    )
+    parser.add_argument(
+        "--max-rpm",
+        type=int,
+        default=None,
+        help="Embedding requests per minute across all requests",
+    )
+    parser.add_argument(
+        "--embed-cache-size",
+        type=int,
+        default=_DEFAULT_EMBED_CACHE_SIZE,
+        help="Embeddings kept in memory to reuse for repeated texts (0 disables)",
+    )
+    parser.add_argument(
+        "--vector-type",
+        choices=("vector", "halfvec"),
+        default="vector",
+        help=(
+            "Column type for target vectors; halfvec stores float16 and halves "
+            "the bytes written (requires pgvector 0.7+)"
+        ),
+    )
+    parser.add_argument(
+        "--exact-count",
+        action="store_true",
+        help="Count rows exactly for progress logs instead of using the estimate",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip rows already present in the target table with the same content",
+    )
+    parser.add_argument(
+        "--embed-cache",
+        default=None,
+        help="SQLite file caching embeddings across runs, keyed by model, dim and text",
+    )
+    parser.add_argument(
+        "--pg-pool-max",
+        type=int,
+        default=None,
+        help=(
+            "PostgreSQL pool size (default: POSTGRES_MAX_CONNECTIONS, raised if "
+            "needed to fit the source cursor and in-flight upserts); must exceed "
+            "the number of tables re-embedded"
+        ),
+    )
     parser.add_argument("--skip-chunks", action="store_true", help="Skip chunks")
     parser.add_argument("--skip-entities", action="store_true", help="Skip entities")
     parser.add_argument("--skip-relations", action="store_true", help="Skip relations")
     return parser.parse_args()
 
 
+# Per-request limits of the embedding APIs: (max texts, max estimated tokens).
+# Bindings other than gemini go through openai_embed.
+_PROVIDER_LIMITS: dict[str, tuple[int, int | None]] = {
+    "openai": (2048, 300_000),
+    "gemini": (100, None),
+}
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token; avoids a tokenizer pass over every text
+    return len(text) // 4 + 1
+
+
+def _split_for_provider(texts: list[str], binding: str) -> list[list[str]]:
+    """Split `texts` into requests that fit the binding's per-request limits."""
+    max_texts, max_tokens = _PROVIDER_LIMITS.get(binding, _PROVIDER_LIMITS["openai"])
+    parts: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = _estimate_tokens(text)
+        if current and (
+            len(current) >= max_texts
+            or (max_tokens is not None and current_tokens + tokens > max_tokens)
+        ):
+            parts.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        parts.append(current)
+    return parts
+
+
 def _build_embedding_func(
     binding: str,
     model: str | None,
@@ -104,43 +355,41 @@ def _build_embedding_func(
     api_key: str | None,
     embedding_send_dim: bool,
     embedding_token_limit: int | None,
+    limiter: _RateLimiter | None = None,
 ) -> EmbeddingFunc:
-    async def _embed(texts: list[str], embedding_dim: int | None = None):
-        if binding == "gemini":
-            from lightrag.llm.gemini import gemini_embed
+    # Resolve the provider function and its fixed arguments once, not per call
+    if binding == "gemini":
+        from lightrag.llm.gemini import gemini_embed as provider_embed
+    else:
+        from lightrag.llm.openai import openai_embed as provider_embed
 
-            actual_func = (
-                gemini_embed.func
-                if isinstance(gemini_embed, EmbeddingFunc)
-                else gemini_embed
+    actual_func = (
+        provider_embed.func
+        if isinstance(provider_embed, EmbeddingFunc)
+        else provider_embed
+    )
+    static_kwargs: dict[str, Any] = {"base_url": host, "api_key": api_key}
+    if binding == "gemini":
+        static_kwargs["task_type"] = "RETRIEVAL_DOCUMENT"
+    if model:
+        static_kwargs["model"] = model
+
+    async def _embed_request(texts: list[str], embedding_dim: int | None):
+        if limiter is not None:
+            await limiter.acquire(sum(_estimate_tokens(text) for text in texts))
+        return await actual_func(
+            texts=texts, embedding_dim=embedding_dim, **static_kwargs
+        )
+
+    async def _embed(texts: list[str], embedding_dim: int | None = None):
+        parts = _split_for_provider(texts, binding)
+        if len(parts) <= 1:
+            return await _embed_request(texts, embedding_dim)
+        return np.concatenate(
+            await asyncio.gather(
+                *(_embed_request(part, embedding_dim) for part in parts)
             )
-            kwargs = {
-                "texts": texts,
-                "base_url": host,
-                "api_key": api_key,
-                "embedding_dim": embedding_dim,
-                "task_type": "RETRIEVAL_DOCUMENT",
-            }
-            if model:
-                kwargs["model"] = model
-            return await actual_func(**kwargs)
-
-        from lightrag.llm.openai import openai_embed
-
-        actual_func = (
-            openai_embed.func
-            if isinstance(openai_embed, EmbeddingFunc)
-            else openai_embed
         )
-        kwargs = {
-            "texts": texts,
-            "base_url": host,
-            "api_key": api_key,
-            "embedding_dim": embedding_dim,
-        }
-        if model:
-            kwargs["model"] = model
-        return await actual_func(**kwargs)
 
     embedding_func = EmbeddingFunc(
         embedding_dim=embedding_dim,
@@ -158,7 +407,21 @@ def _build_embedding_func(
     return embedding_func
 
 
-async def _count_rows(db, table_name: str, workspace: str) -> int:
+async def _count_rows(db, table_name: str, workspace: str, exact: bool) -> int:
+    """Return the number of rows to re-embed, for progress logs only.
+
+    By default this is the planner's row estimate for the whole table, which
+    is free; an exact per-workspace COUNT(*) can mean a full sequential scan.
+    Tables that were never analyzed have no estimate and are counted exactly.
+    """
+    if not exact:
+        res = await db.query(
+            "SELECT reltuples::bigint AS count FROM pg_class "
+            "WHERE oid = to_regclass($1)",
+            [table_name],
+        )
+        if res and res["count"] >= 0:
+            return int(res["count"])
     sql = f"SELECT COUNT(*) AS count FROM {table_name} WHERE workspace=$1"
     res = await db.query(sql, [workspace])
     return int(res["count"]) if res else 0
@@ -170,73 +433,310 @@ async def _fetch_rows(
     columns: list[str],
     workspace: str,
     batch_size: int,
-) -> Iterable[list[dict[str, Any]]]:
-    last_id: str | None = None
-    column_list = ", ".join(columns)
-    while True:
-        if last_id is None:
-            sql = (
-                f"SELECT {column_list} FROM {table_name} "
-                "WHERE workspace=$1 ORDER BY id LIMIT $2"
-            )
-            params = [workspace, batch_size]
+    done_table: str | None = None,
+) -> AsyncIterator[asyncpg.Record]:
+    """Stream a workspace's rows through a server-side cursor.
+
+    The cursor runs in its own transaction on a dedicated pooled connection,
+    so the scan is one query instead of a keyset SELECT per page and only
+    `batch_size` rows are prefetched at a time. Rows are yielded one by one
+    so callers can batch them by size. With `done_table`, rows that already
+    exist there with the same content are filtered out in Postgres.
+    """
+    sql = f"SELECT {', '.join(columns)} FROM {table_name} s"
+    if done_table:
+        sql += (
+            f" LEFT JOIN {done_table} t ON t.workspace = s.workspace"
+            " AND t.id = s.id AND t.content = s.content"
+            " WHERE s.workspace=$1 AND t.id IS NULL"
+        )
+    else:
+        sql += " WHERE s.workspace=$1"
+    async with db.pool.acquire() as connection:
+        async with connection.transaction():
+            async for record in connection.cursor(sql, workspace, prefetch=batch_size):
+                yield record
+
+
+# Each builder unpacks a record positionally, in the order of its column list,
+# into the item dict that the target storage's value builder reads. Columns
+# are select expressions over the source table aliased as `s`; chunk_ids
+# (VARCHAR[]) is joined into the `<SEP>` separated source_id in Postgres.
+_CHUNK_COLUMNS = [
+    "s.id",
+    "s.full_doc_id",
+    "s.chunk_order_index",
+    "s.tokens",
+    "s.content",
+    "s.file_path",
+]
+_SOURCE_ID_COLUMN = "COALESCE(array_to_string(s.chunk_ids, '<SEP>'), '')"
+_ENTITY_COLUMNS = [
+    "s.id",
+    "s.entity_name",
+    "s.content",
+    _SOURCE_ID_COLUMN,
+    "s.file_path",
+]
+_RELATION_COLUMNS = [
+    "s.id",
+    "s.source_id",
+    "s.target_id",
+    "s.content",
+    _SOURCE_ID_COLUMN,
+    "s.file_path",
+]
+
+
+def _chunk_item(row: asyncpg.Record) -> dict[str, Any]:
+    record_id, full_doc_id, chunk_order_index, tokens, content, file_path = row
+    return {
+        "__id__": record_id,
+        "full_doc_id": full_doc_id,
+        "chunk_order_index": chunk_order_index,
+        "tokens": tokens,
+        "content": content,
+        "file_path": file_path,
+    }
+
+
+def _entity_item(row: asyncpg.Record) -> dict[str, Any]:
+    record_id, entity_name, content, source_id, file_path = row
+    return {
+        "__id__": record_id,
+        "entity_name": entity_name,
+        "content": content,
+        "source_id": source_id,
+        "file_path": file_path,
+    }
+
+
+def _relation_item(row: asyncpg.Record) -> dict[str, Any]:
+    record_id, src_id, tgt_id, content, source_id, file_path = row
+    return {
+        "__id__": record_id,
+        "src_id": src_id,
+        "tgt_id": tgt_id,
+        "content": content,
+        "source_id": source_id,
+        "file_path": file_path,
+    }
+
+
+async def _embed_batch(
+    storage,
+    batch: list[dict[str, Any]],
+    settings: ReembedSettings,
+    stats: ReembedStats,
+    dtype: type[np.floating] = np.float32,
+) -> None:
+    """Embed each distinct content of `batch` once, setting `__vector__`.
+
+    Texts already embedded earlier in the run are served from the in-memory
+    cache, then from the on-disk store of earlier runs when one is configured;
+    the remaining distinct texts are sent to the embedding function in
+    `embedding_batch_num` sized requests, like `PGVectorStorage.upsert` does.
+    """
+    cache, store = settings.cache, settings.store
+    keys = [cache.key(item["content"]) for item in batch]
+    vectors: dict[bytes, np.ndarray] = {}
+    pending: dict[bytes, str] = {}
+    for item, key in zip(batch, keys):
+        if key in vectors or key in pending:
+            continue
+        vec = cache.get(key)
+        if vec is not None:
+            vectors[key] = vec
         else:
-            sql = (
-                f"SELECT {column_list} FROM {table_name} "
-                "WHERE workspace=$1 AND id > $2 ORDER BY id LIMIT $3"
+            pending[key] = item["content"]
+
+    if pending and store is not None:
+        for key, vec in store.get_many(list(pending)).items():
+            vectors[key] = vec
+            cache.put(key, vec)
+            del pending[key]
+
+    if pending:
+        texts = list(pending.values())
+        step = storage._max_batch_size
+        embeddings = np.concatenate(
+            await asyncio.gather(
+                *(
+                    storage.embedding_func(texts[i : i + step])
+                    for i in range(0, len(texts), step)
+                )
             )
-            params = [workspace, last_id, batch_size]
-        rows = await db.query(sql, params, multirows=True)
-        if not rows:
-            break
-        last_id = rows[-1]["id"]
-        yield rows
+        )
+        for key, vec in zip(pending, embeddings):
+            vectors[key] = vec
+            cache.put(key, vec)
+        if store is not None:
+            store.put_many(zip(pending, embeddings))
+
+    stats.reused += len(batch) - len(pending)
+    for item, key in zip(batch, keys):
+        item["__vector__"] = vectors[key].astype(dtype, copy=False)
+
+
+async def _convert_to_halfvec(storage, embedding_dim: int) -> None:
+    """Switch the target table's `content_vector` column to `halfvec`.
+
+    Vector indexes on the column are dropped and recreated with the halfvec
+    operator class under the same name, so `PGVectorStorage` still finds them
+    on later startups and leaves the column type alone.
+    """
+    from lightrag.kg.postgres_impl import get_vector_column_type
+
+    column_type = await get_vector_column_type(storage)
+    if column_type and column_type.startswith("halfvec"):
+        return
+
+    table_name = storage.table_name
+    indexes = await storage.db.query(
+        """SELECT indexname, indexdef FROM pg_indexes
+           WHERE tablename = $1 AND indexdef LIKE '%content_vector%'""",
+        [table_name.lower()],
+        multirows=True,
+    )
 
+    async def _convert(connection) -> None:
+        async with connection.transaction():
+            for index in indexes or []:
+                await connection.execute(f"DROP INDEX {index['indexname']}")
+            await connection.execute(
+                f"ALTER TABLE {table_name} ALTER COLUMN content_vector "
+                f"TYPE HALFVEC({embedding_dim})"
+            )
+            for index in indexes or []:
+                await connection.execute(
+                    index["indexdef"].replace("vector_cosine_ops", "halfvec_cosine_ops")
+                )
 
-def _chunk_ids_to_source_id(chunk_ids: Any) -> str:
-    if not chunk_ids:
-        return ""
-    if isinstance(chunk_ids, (list, tuple)):
-        return "<SEP>".join(str(c) for c in chunk_ids if c)
-    return str(chunk_ids)
+    logger.info(
+        "Converting %s.content_vector to halfvec(%s)", table_name, embedding_dim
+    )
+    await storage.db._run_with_retry(_convert)
 
 
-async def _reembed_chunks(
+async def _reembed_table(
+    name: str,
     db,
     table_name: str,
+    columns: list[str],
+    build_item: Callable[[asyncpg.Record], dict[str, Any]],
     storage,
     workspace: str,
-    batch_size: int,
+    settings: ReembedSettings,
 ) -> None:
-    stats = ReembedStats(name="chunks")
-    stats.total = await _count_rows(db, table_name, workspace)
+    """Re-embed one source table into `storage`.
+
+    Batches are built by a producer task into a small queue, so fetching runs
+    while the current batch is being embedded and written. A batch is cut at
+    `batch_size` rows or `max_batch_bytes` of content, whichever comes first,
+    so tables with long texts do not buffer much more memory than others.
+
+    Up to `max_inflight` batches are upserted concurrently, which keeps that
+    many embedding requests open against the provider. Identical contents are
+    embedded only once (see `_embed_batch`). With `resume`, rows the target
+    table already holds with unchanged content are not fetched.
+    """
+    from lightrag.kg.postgres_impl import (
+        BatchWritePipeline,
+        VectorCopyPlan,
+        copy_vector_values,
+        get_vector_dtype,
+    )
+
+    stats = ReembedStats(name=name)
+    stats.total = await _count_rows(db, table_name, workspace, settings.exact_count)
+    queue: asyncio.Queue[list[dict[str, Any]] | None] = asyncio.Queue(
+        maxsize=_FETCH_QUEUE_SIZE
+    )
 
-    async for rows in _fetch_rows(
+    async def _produce() -> None:
+        try:
+            batch: list[dict[str, Any]] = []
+            batch_bytes = 0
+            async for row in _fetch_rows(
+                db,
+                table_name,
+                columns,
+                workspace,
+                settings.batch_size,
+                done_table=storage.table_name if settings.resume else None,
+            ):
+                item = build_item(row)
+                content = item["content"]
+                if not content:
+                    stats.skipped += 1
+                    continue
+                batch.append(item)
+                # Characters stand in for bytes; no need to encode every text
+                batch_bytes += len(content)
+                if (
+                    len(batch) >= settings.batch_size
+                    or batch_bytes >= settings.max_batch_bytes
+                ):
+                    await queue.put(batch)
+                    batch = []
+                    batch_bytes = 0
+            if batch:
+                await queue.put(batch)
+        finally:
+            await queue.put(None)
+
+    # Writes bypass storage.upsert: vectors are computed here, and the batch is
+    # loaded with COPY into a staging table and merged into the target table
+    upsert_sql, build_values = storage._upsert_statement()
+    plan = VectorCopyPlan.from_upsert_sql(upsert_sql)
+    dtype = await get_vector_dtype(storage)
+    pipeline = BatchWritePipeline(settings.max_inflight)
+
+    async def _upsert(batch: list[dict[str, Any]]) -> None:
+        await _embed_batch(storage, batch, settings, stats, dtype)
+        current_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        await copy_vector_values(
+            storage.db,
+            plan,
+            [build_values(item, current_time) for item in batch],
+        )
+        stats.processed += len(batch)
+        logger.info("Re-embed %s progress: %s/%s", name, stats.processed, stats.total)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        while (batch := await queue.get()) is not None:
+            # Blocks while max_inflight batches are pending, so fetching stays
+            # bounded too; raises the first failed upsert before more batches
+            # are embedded
+            await pipeline.submit(_upsert(batch), len(batch))
+        await pipeline.drain()
+        # Surface a failed fetch once the queue is drained
+        await producer
+    finally:
+        producer.cancel()
+        pipeline.cancel()
+
+    stats.log()
+
+
+async def _reembed_chunks(
+    db,
+    table_name: str,
+    storage,
+    workspace: str,
+    settings: ReembedSettings,
+) -> None:
+    await _reembed_table(
+        "chunks",
         db,
         table_name,
-        ["id", "full_doc_id", "chunk_order_index", "tokens", "content", "file_path"],
+        _CHUNK_COLUMNS,
+        _chunk_item,
+        storage,
         workspace,
-        batch_size,
-    ):
-        batch: dict[str, dict[str, Any]] = {}
-        for row in rows:
-            content = row.get("content")
-            if not content:
-                stats.skipped += 1
-                continue
-            batch[row["id"]] = {
-                "full_doc_id": row.get("full_doc_id"),
-                "chunk_order_index": row.get("chunk_order_index"),
-                "tokens": row.get("tokens"),
-                "content": content,
-                "file_path": row.get("file_path"),
-            }
-        if batch:
-            await storage.upsert(batch)
-            stats.processed += len(batch)
-            logger.info("Re-embed chunks progress: %s/%s", stats.processed, stats.total)
-
-    stats.log()
+        settings,
+    )
 
 
 async def _reembed_entities(
@@ -244,38 +744,18 @@ async def _reembed_entities(
     table_name: str,
     storage,
     workspace: str,
-    batch_size: int,
+    settings: ReembedSettings,
 ) -> None:
-    stats = ReembedStats(name="entities")
-    stats.total = await _count_rows(db, table_name, workspace)
-
-    async for rows in _fetch_rows(
+    await _reembed_table(
+        "entities",
         db,
         table_name,
-        ["id", "entity_name", "content", "chunk_ids", "file_path"],
+        _ENTITY_COLUMNS,
+        _entity_item,
+        storage,
         workspace,
-        batch_size,
-    ):
-        batch: dict[str, dict[str, Any]] = {}
-        for row in rows:
-            content = row.get("content")
-            if not content:
-                stats.skipped += 1
-                continue
-            batch[row["id"]] = {
-                "entity_name": row.get("entity_name"),
-                "content": content,
-                "source_id": _chunk_ids_to_source_id(row.get("chunk_ids")),
-                "file_path": row.get("file_path"),
-            }
-        if batch:
-            await storage.upsert(batch)
-            stats.processed += len(batch)
-            logger.info(
-                "Re-embed entities progress: %s/%s", stats.processed, stats.total
-            )
-
-    stats.log()
+        settings,
+    )
 
 
 async def _reembed_relations(
@@ -283,39 +763,18 @@ async def _reembed_relations(
     table_name: str,
     storage,
     workspace: str,
-    batch_size: int,
+    settings: ReembedSettings,
 ) -> None:
-    stats = ReembedStats(name="relations")
-    stats.total = await _count_rows(db, table_name, workspace)
-
-    async for rows in _fetch_rows(
+    await _reembed_table(
+        "relations",
         db,
         table_name,
-        ["id", "source_id", "target_id", "content", "chunk_ids", "file_path"],
+        _RELATION_COLUMNS,
+        _relation_item,
+        storage,
         workspace,
-        batch_size,
-    ):
-        batch: dict[str, dict[str, Any]] = {}
-        for row in rows:
-            content = row.get("content")
-            if not content:
-                stats.skipped += 1
-                continue
-            batch[row["id"]] = {
-                "src_id": row.get("source_id"),
-                "tgt_id": row.get("target_id"),
-                "content": content,
-                "source_id": _chunk_ids_to_source_id(row.get("chunk_ids")),
-                "file_path": row.get("file_path"),
-            }
-        if batch:
-            await storage.upsert(batch)
-            stats.processed += len(batch)
-            logger.info(
-                "Re-embed relations progress: %s/%s", stats.processed, stats.total
-            )
-
-    stats.log()
+        settings,
+    )
 
 
 async def _run() -> int:
@@ -365,6 +824,11 @@ async def _run() -> int:
         api_key=embedding_api_key,
         embedding_send_dim=embedding_send_dim,
         embedding_token_limit=embedding_token_limit,
+        limiter=(
+            _RateLimiter(args.max_tpm, args.max_rpm)
+            if args.max_tpm or args.max_rpm
+            else None
+        ),
     )
 
     global_config = {
@@ -377,6 +841,36 @@ async def _run() -> int:
         "working_dir": os.environ.get("WORKING_DIR", "./data/rag_storage"),
     }
 
+    # Tables are re-embedded concurrently; each source cursor holds one pooled
+    # connection for its whole scan and each in-flight upsert needs another
+    tables = sum(
+        not skip for skip in (args.skip_chunks, args.skip_entities, args.skip_relations)
+    )
+    pool_size = tables * (args.max_inflight + 1) + 1
+    if args.pg_pool_max is not None:
+        # With no connection left beside the cursors, upserts wait forever
+        if args.pg_pool_max < tables + 1:
+            logger.error(
+                "--pg-pool-max must be at least %s for %s tables", tables + 1, tables
+            )
+            return 2
+        if args.pg_pool_max < pool_size:
+            logger.warning(
+                "--pg-pool-max %s is below %s; upserts will wait for connections",
+                args.pg_pool_max,
+                pool_size,
+            )
+        os.environ["POSTGRES_MAX_CONNECTIONS"] = str(args.pg_pool_max)
+    else:
+        configured_pool_size = int(ClientManager.get_config()["max_connections"])
+        if configured_pool_size < pool_size:
+            logger.info(
+                "Raising POSTGRES_MAX_CONNECTIONS from %s to %s for concurrent upserts",
+                configured_pool_size,
+                pool_size,
+            )
+            os.environ["POSTGRES_MAX_CONNECTIONS"] = str(pool_size)
+
     db = await ClientManager.get_client()
 
     source_embedding = EmbeddingFunc(
@@ -433,28 +927,69 @@ async def _run() -> int:
     await target_entities.initialize()
     await target_relations.initialize()
 
+    if args.vector_type == "halfvec":
+        for skip, target in (
+            (args.skip_chunks, target_chunks),
+            (args.skip_entities, target_entities),
+            (args.skip_relations, target_relations),
+        ):
+            if not skip:
+                await _convert_to_halfvec(target, target_dim)
+
+    settings = ReembedSettings(
+        batch_size=args.batch_size,
+        max_batch_bytes=args.max_batch_bytes,
+        max_inflight=args.max_inflight,
+        # Shared across tables so a text repeated anywhere in the run is
+        # embedded once
+        cache=_EmbeddingCache(args.embed_cache_size),
+        resume=args.resume,
+        exact_count=args.exact_count,
+        store=(
+            _EmbeddingStore(args.embed_cache, target_model, target_dim)
+            if args.embed_cache
+            else None
+        ),
+    )
+
+    # The three tables are written independently, so re-embed them at once
+    phases = []
     if not args.skip_chunks:
-        await _reembed_chunks(
-            db, source_chunks.table_name, target_chunks, workspace, args.batch_size
+        phases.append(
+            _reembed_chunks(
+                db, source_chunks.table_name, target_chunks, workspace, settings
+            )
         )
     if not args.skip_entities:
-        await _reembed_entities(
-            db, source_entities.table_name, target_entities, workspace, args.batch_size
+        phases.append(
+            _reembed_entities(
+                db, source_entities.table_name, target_entities, workspace, settings
+            )
         )
     if not args.skip_relations:
-        await _reembed_relations(
-            db,
-            source_relations.table_name,
-            target_relations,
-            workspace,
-            args.batch_size,
+        phases.append(
+            _reembed_relations(
+                db, source_relations.table_name, target_relations, workspace, settings
+            )
         )
+    try:
+        await asyncio.gather(*phases)
+    finally:
+        if settings.store is not None:
+            settings.store.close()
 
     await ClientManager.release_client(db)
     return 0
 
 
 def main() -> int:
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     start = time.time()
     try:
         return asyncio.run(_run())
@@ -1893,6 +1893,7 @@ async def use_llm_func_with_cache(
     chunk_id: str | None = None,
     cache_keys_collector: list = None,
     thinking_budget: int = 0,
+    history_cache_key: str | None = None,
 ) -> tuple[str, int]:
     """Call LLM function with cache support and text sanitization
 
@@ -1912,6 +1913,8 @@ async def use_llm_func_with_cache(
         text_chunks_storage: Text chunks storage to update llm_cache_list
         cache_keys_collector: Optional list to collect cache keys for batch processing
         thinking_budget: Optional thinking budget in tokens
+        history_cache_key: Optional precomputed digest of history_messages, used in
+            the cache key instead of re-serializing the history on every call
     Returns:
         tuple[str, int]: (LLM response text, timestamp)
             - For cache hits: (content, cache_create_time)
@@ -1932,11 +1935,16 @@ async def use_llm_func_with_cache(
             if "content" in safe_msg:
                 safe_msg["content"] = sanitize_text_for_encoding(safe_msg["content"])
             safe_history_messages.append(safe_msg)
-        history = json.dumps(safe_history_messages, ensure_ascii=False)
-    else:
-        history = None
 
     if llm_response_cache:
+        # The serialized history is only needed for the cache key
+        if not safe_history_messages:
+            history = None
+        elif history_cache_key is not None:
+            history = history_cache_key
+        else:
+            history = json.dumps(safe_history_messages, ensure_ascii=False)
+
         prompt_parts = []
         if safe_user_prompt:
             prompt_parts.append(safe_user_prompt)
@@ -1,35 +1,66 @@
 from __future__ import annotations
 
 import asyncio
+import importlib
 import os
 import sys
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Literal
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Literal
 
 from dotenv import load_dotenv
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 
-ENV_PATH = os.getenv("LIGHTRAG_ENV_PATH")
-if ENV_PATH:
-    load_dotenv(ENV_PATH, override=False)
-else:
+from mcp.server.fastmcp import FastMCP
+
+
+@lru_cache(maxsize=1)
+def _load_env_once() -> Path | None:
+    """Load the first .env found (or LIGHTRAG_ENV_PATH) once per process."""
+    env_path = os.getenv("LIGHTRAG_ENV_PATH")
+    if env_path:
+        load_dotenv(env_path, override=False)
+        return Path(env_path)
     candidate_envs = [
         Path.cwd() / ".env",
         REPO_ROOT / ".env",
         Path(__file__).parent / ".env",
     ]
-    for env_path in candidate_envs:
-        if env_path.exists():
-            load_dotenv(env_path, override=False)
-
-from lightrag import LightRAG
-from lightrag.base import QueryParam
-from lightrag.utils import EmbeddingFunc, get_env_value, logger, wrap_embedding_func_with_attrs
-
-from mcp.server.fastmcp import FastMCP
+    for candidate in candidate_envs:
+        if candidate.exists():
+            load_dotenv(candidate, override=False)
+            return candidate
+    return None
+
+
+if TYPE_CHECKING:
+    from lightrag import LightRAG
+    from lightrag.base import QueryParam
+    from lightrag.utils import EmbeddingFunc
+
+# LightRAG is imported on first use so that loading this module (e.g. for tool
+# schema introspection) does not pull in the whole storage/LLM dependency graph.
+_LAZY_ATTRS = {
+    "LightRAG": ("lightrag", "LightRAG"),
+    "QueryParam": ("lightrag.base", "QueryParam"),
+    "EmbeddingFunc": ("lightrag.utils", "EmbeddingFunc"),
+}
+
+
+def __getattr__(name: str) -> Any:
+    target = _LAZY_ATTRS.get(name)
+    if target is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # LightRAG reads several defaults from the environment at import time.
+    _load_env_once()
+    module_name, attr = target
+    value = getattr(importlib.import_module(module_name), attr)
+    globals()[name] = value
+    return value
 
 
 def _default_host(binding: str) -> str:
@@ -70,7 +101,12 @@ class MCPSettings:
     embedding_timeout: int
 
     @classmethod
+    @lru_cache(maxsize=1)
     def from_env(cls) -> "MCPSettings":
+        # Cached for the process, so never snapshot the env before .env is in it.
+        _load_env_once()
+        from lightrag.utils import get_env_value
+
         llm_binding = get_env_value("LLM_BINDING", "ollama").lower()
         embedding_binding = get_env_value("EMBEDDING_BINDING", "ollama").lower()
         if llm_binding == "openai-ollama":
@@ -108,112 +144,245 @@ class MCPSettings:
             embedding_timeout=get_env_value("EMBEDDING_TIMEOUT", 30, int),
         )
 
+    @classmethod
+    def reload(cls) -> "MCPSettings":
+        """Drop the cached settings and read them from the environment again."""
+        cls.from_env.cache_clear()
+        return cls.from_env()
+
+
+def _ollama_llm(settings: MCPSettings) -> tuple[Callable[..., Any], dict[str, Any]]:
+    from lightrag.llm.ollama import ollama_model_complete
+
+    return ollama_model_complete, {
+        "host": settings.llm_binding_host,
+        "api_key": settings.llm_binding_api_key,
+        "timeout": settings.llm_timeout,
+    }
+
+
+def _openai_llm(settings: MCPSettings) -> tuple[Callable[..., Any], dict[str, Any]]:
+    from lightrag.llm.openai import openai_complete
+
+    return openai_complete, {
+        "base_url": settings.llm_binding_host,
+        "api_key": settings.llm_binding_api_key,
+        "timeout": settings.llm_timeout,
+    }
+
+
+def _azure_openai_llm(
+    settings: MCPSettings,
+) -> tuple[Callable[..., Any], dict[str, Any]]:
+    from lightrag.llm.azure_openai import azure_openai_complete
+
+    return azure_openai_complete, {
+        "base_url": settings.llm_binding_host,
+        "api_key": settings.llm_binding_api_key,
+        "api_version": os.getenv("AZURE_OPENAI_API_VERSION"),
+        "timeout": settings.llm_timeout,
+    }
+
+
+def _gemini_llm(settings: MCPSettings) -> tuple[Callable[..., Any], dict[str, Any]]:
+    from lightrag.llm.gemini import gemini_complete_if_cache
+
+    async def llm_func(
+        prompt: str,
+        system_prompt: str | None = None,
+        history_messages: list[dict[str, Any]] | None = None,
+        enable_cot: bool = False,
+        **kwargs: Any,
+    ) -> str:
+        return await gemini_complete_if_cache(
+            settings.llm_model,
+            prompt,
+            system_prompt=system_prompt,
+            history_messages=history_messages or [],
+            enable_cot=enable_cot,
+            **kwargs,
+        )
+
+    return llm_func, {
+        "base_url": settings.llm_binding_host,
+        "api_key": settings.llm_binding_api_key,
+        "timeout": settings.llm_timeout,
+    }
+
+
+def _aws_bedrock_llm(
+    settings: MCPSettings,
+) -> tuple[Callable[..., Any], dict[str, Any]]:
+    from lightrag.llm.bedrock import bedrock_model_complete
+
+    return bedrock_model_complete, {}
+
+
+def _lollms_llm(settings: MCPSettings) -> tuple[Callable[..., Any], dict[str, Any]]:
+    from lightrag.llm.lollms import lollms_model_complete
+
+    return lollms_model_complete, {
+        "host": settings.llm_binding_host,
+        "api_key": settings.llm_binding_api_key,
+    }
+
+
+_LLM_BUILDERS: dict[
+    str, Callable[[MCPSettings], tuple[Callable[..., Any], dict[str, Any]]]
+] = {
+    "ollama": _ollama_llm,
+    "openai": _openai_llm,
+    "azure_openai": _azure_openai_llm,
+    "gemini": _gemini_llm,
+    "aws_bedrock": _aws_bedrock_llm,
+    "lollms": _lollms_llm,
+}
+
 
 def _build_llm_model_func(
     settings: MCPSettings,
 ) -> tuple[Callable[..., Any], dict[str, Any]]:
-    binding = settings.llm_binding
-    llm_kwargs: dict[str, Any] = {}
+    builder = _LLM_BUILDERS.get(settings.llm_binding)
+    if builder is None:
+        raise ValueError(f"Unsupported LLM_BINDING: {settings.llm_binding}")
+    return builder(settings)
 
-    if binding == "ollama":
-        from lightrag.llm.ollama import ollama_model_complete
-
-        llm_func = ollama_model_complete
-        llm_kwargs = {
-            "host": settings.llm_binding_host,
-            "api_key": settings.llm_binding_api_key,
-            "timeout": settings.llm_timeout,
-        }
-    elif binding == "openai":
-        from lightrag.llm.openai import openai_complete
-
-        llm_func = openai_complete
-        llm_kwargs = {
-            "base_url": settings.llm_binding_host,
-            "api_key": settings.llm_binding_api_key,
-            "timeout": settings.llm_timeout,
-        }
-    elif binding == "azure_openai":
-        from lightrag.llm.azure_openai import azure_openai_complete
-
-        llm_func = azure_openai_complete
-        llm_kwargs = {
-            "base_url": settings.llm_binding_host,
-            "api_key": settings.llm_binding_api_key,
-            "api_version": os.getenv("AZURE_OPENAI_API_VERSION"),
-            "timeout": settings.llm_timeout,
-        }
-    elif binding == "gemini":
-        from lightrag.llm.gemini import gemini_complete_if_cache
-
-        async def llm_func(
-            prompt: str,
-            system_prompt: str | None = None,
-            history_messages: list[dict[str, Any]] | None = None,
-            enable_cot: bool = False,
-            **kwargs: Any,
-        ) -> str:
-            return await gemini_complete_if_cache(
-                settings.llm_model,
-                prompt,
-                system_prompt=system_prompt,
-                history_messages=history_messages or [],
-                enable_cot=enable_cot,
-                **kwargs,
-            )
 
-        llm_kwargs = {
-            "base_url": settings.llm_binding_host,
-            "api_key": settings.llm_binding_api_key,
-            "timeout": settings.llm_timeout,
-        }
-    elif binding == "aws_bedrock":
-        from lightrag.llm.bedrock import bedrock_model_complete
-
-        llm_func = bedrock_model_complete
-    elif binding == "lollms":
-        from lightrag.llm.lollms import lollms_model_complete
-
-        llm_func = lollms_model_complete
-        llm_kwargs = {
-            "host": settings.llm_binding_host,
-            "api_key": settings.llm_binding_api_key,
-        }
+_EmbedCall = Callable[..., Awaitable[Any]]
+_EmbedFactory = Callable[[Callable[..., Any], MCPSettings, str | None], _EmbedCall]
+
+
+def _bind_embed(
+    raw_func: Callable[..., Any], call_kwargs: dict[str, Any], *, pass_dim: bool
+) -> _EmbedCall:
+    """Return an embed coroutine that calls raw_func with pre-built kwargs."""
+    if pass_dim:
+
+        async def embed(
+            texts: list[str], embedding_dim: int | None = None, **kwargs: Any
+        ):
+            return await raw_func(texts, embedding_dim=embedding_dim, **call_kwargs)
+
     else:
-        raise ValueError(f"Unsupported LLM_BINDING: {binding}")
 
-    return llm_func, llm_kwargs
+        async def embed(
+            texts: list[str], embedding_dim: int | None = None, **kwargs: Any
+        ):
+            return await raw_func(texts, **call_kwargs)
+
+    return embed
+
+
+def _ollama_embed(
+    raw_func: Callable[..., Any], settings: MCPSettings, model_name: str | None
+) -> _EmbedCall:
+    call_kwargs = {
+        "embed_model": model_name or "bge-m3:latest",
+        "host": settings.embedding_binding_host,
+        "api_key": settings.embedding_binding_api_key,
+        "timeout": settings.embedding_timeout,
+    }
+
+    async def embed(texts: list[str], embedding_dim: int | None = None, **kwargs: Any):
+        return await raw_func(texts, **call_kwargs, **kwargs)
+
+    return embed
+
+
+def _openai_embed(
+    raw_func: Callable[..., Any], settings: MCPSettings, model_name: str | None
+) -> _EmbedCall:
+    call_kwargs = {
+        "base_url": settings.embedding_binding_host,
+        "api_key": settings.embedding_binding_api_key,
+    }
+    if model_name:
+        call_kwargs["model"] = model_name
+    return _bind_embed(raw_func, call_kwargs, pass_dim=True)
+
+
+def _azure_openai_embed(
+    raw_func: Callable[..., Any], settings: MCPSettings, model_name: str | None
+) -> _EmbedCall:
+    deployment = model_name or os.getenv("AZURE_EMBEDDING_DEPLOYMENT")
+    call_kwargs = {
+        "base_url": settings.embedding_binding_host,
+        "api_key": settings.embedding_binding_api_key,
+        "use_azure": True,
+        "azure_deployment": deployment,
+        "api_version": os.getenv("AZURE_EMBEDDING_API_VERSION"),
+    }
+    if deployment:
+        call_kwargs["model"] = deployment
+    return _bind_embed(raw_func, call_kwargs, pass_dim=True)
+
+
+def _gemini_embed(
+    raw_func: Callable[..., Any], settings: MCPSettings, model_name: str | None
+) -> _EmbedCall:
+    call_kwargs = {
+        "base_url": settings.embedding_binding_host,
+        "api_key": settings.embedding_binding_api_key,
+        "timeout": settings.embedding_timeout,
+    }
+    if model_name:
+        call_kwargs["model"] = model_name
+    return _bind_embed(raw_func, call_kwargs, pass_dim=True)
+
+
+def _lollms_embed(
+    raw_func: Callable[..., Any], settings: MCPSettings, model_name: str | None
+) -> _EmbedCall:
+    call_kwargs = {
+        "embed_model": model_name,
+        "base_url": settings.embedding_binding_host,
+        "api_key": settings.embedding_binding_api_key,
+    }
+    return _bind_embed(raw_func, call_kwargs, pass_dim=False)
+
+
+def _aws_bedrock_embed(
+    raw_func: Callable[..., Any], settings: MCPSettings, model_name: str | None
+) -> _EmbedCall:
+    call_kwargs = {"model": model_name} if model_name else {}
+    return _bind_embed(raw_func, call_kwargs, pass_dim=False)
+
+
+# (module, attribute) of the provider embedding function for each binding, and
+# the factory that resolves its call arguments once, when the embedding
+# function is built, into a branch-free embed coroutine.
+_EMBED_PROVIDERS: dict[str, tuple[str, str, _EmbedFactory]] = {
+    "ollama": ("lightrag.llm.ollama", "ollama_embed", _ollama_embed),
+    "openai": ("lightrag.llm.openai", "openai_embed", _openai_embed),
+    "azure_openai": ("lightrag.llm.openai", "openai_embed", _azure_openai_embed),
+    "gemini": ("lightrag.llm.gemini", "gemini_embed", _gemini_embed),
+    # jina takes the same arguments as the OpenAI-compatible endpoint.
+    "jina": ("lightrag.llm.jina", "jina_embed", _openai_embed),
+    "lollms": ("lightrag.llm.lollms", "lollms_embed", _lollms_embed),
+    "aws_bedrock": ("lightrag.llm.bedrock", "bedrock_embed", _aws_bedrock_embed),
+}
 
 
 def _build_embedding_func(settings: MCPSettings) -> EmbeddingFunc:
-    binding = settings.embedding_binding
-    embedding_func: EmbeddingFunc | Callable[..., Any]
+    from lightrag.utils import EmbeddingFunc, wrap_embedding_func_with_attrs
 
-    if binding == "ollama":
-        from lightrag.llm.ollama import ollama_embed as embedding_func
-    elif binding == "openai":
-        from lightrag.llm.openai import openai_embed as embedding_func
-    elif binding == "azure_openai":
-        from lightrag.llm.openai import openai_embed as embedding_func
-    elif binding == "gemini":
-        from lightrag.llm.gemini import gemini_embed as embedding_func
-    elif binding == "jina":
-        from lightrag.llm.jina import jina_embed as embedding_func
-    elif binding == "lollms":
-        from lightrag.llm.lollms import lollms_embed as embedding_func
-    elif binding == "aws_bedrock":
-        from lightrag.llm.bedrock import bedrock_embed as embedding_func
-    else:
+    binding = settings.embedding_binding
+    provider = _EMBED_PROVIDERS.get(binding)
+    if provider is None:
         raise ValueError(f"Unsupported EMBEDDING_BINDING: {binding}")
-
-    provider_dim = embedding_func.embedding_dim if isinstance(embedding_func, EmbeddingFunc) else None
-    provider_max_tokens = (
-        embedding_func.max_token_size if isinstance(embedding_func, EmbeddingFunc) else None
+    module_name, attr, factory = provider
+    embedding_func: EmbeddingFunc | Callable[..., Any] = getattr(
+        importlib.import_module(module_name), attr
     )
-    provider_model = (
-        embedding_func.model_name if isinstance(embedding_func, EmbeddingFunc) else None
-    )
-    raw_func = embedding_func.func if isinstance(embedding_func, EmbeddingFunc) else embedding_func
+
+    if isinstance(embedding_func, EmbeddingFunc):
+        provider_dim = embedding_func.embedding_dim
+        provider_max_tokens = embedding_func.max_token_size
+        provider_model = embedding_func.model_name
+        raw_func = embedding_func.func
+    else:
+        provider_dim = provider_max_tokens = provider_model = None
+        raw_func = embedding_func
 
     embedding_dim = settings.embedding_dim or provider_dim
     if embedding_dim is None:
@@ -234,70 +403,7 @@ def _build_embedding_func(settings: MCPSettings) -> EmbeddingFunc:
     elif provider_dim and settings.embedding_dim and settings.embedding_dim != provider_dim:
         send_dimensions = True
 
-    async def embed(texts: list[str], embedding_dim: int | None = None, **kwargs: Any):
-        if binding == "ollama":
-            return await raw_func(
-                texts,
-                embed_model=model_name or "bge-m3:latest",
-                host=settings.embedding_binding_host,
-                api_key=settings.embedding_binding_api_key,
-                timeout=settings.embedding_timeout,
-                **kwargs,
-            )
-        if binding == "openai":
-            call_kwargs = {
-                "base_url": settings.embedding_binding_host,
-                "api_key": settings.embedding_binding_api_key,
-                "embedding_dim": embedding_dim,
-            }
-            if model_name:
-                call_kwargs["model"] = model_name
-            return await raw_func(texts, **call_kwargs)
-        if binding == "azure_openai":
-            deployment = model_name or os.getenv("AZURE_EMBEDDING_DEPLOYMENT")
-            call_kwargs = {
-                "base_url": settings.embedding_binding_host,
-                "api_key": settings.embedding_binding_api_key,
-                "embedding_dim": embedding_dim,
-                "use_azure": True,
-                "azure_deployment": deployment,
-                "api_version": os.getenv("AZURE_EMBEDDING_API_VERSION"),
-            }
-            if deployment:
-                call_kwargs["model"] = deployment
-            return await raw_func(texts, **call_kwargs)
-        if binding == "gemini":
-            call_kwargs = {
-                "base_url": settings.embedding_binding_host,
-                "api_key": settings.embedding_binding_api_key,
-                "embedding_dim": embedding_dim,
-                "timeout": settings.embedding_timeout,
-            }
-            if model_name:
-                call_kwargs["model"] = model_name
-            return await raw_func(texts, **call_kwargs)
-        if binding == "jina":
-            call_kwargs = {
-                "base_url": settings.embedding_binding_host,
-                "api_key": settings.embedding_binding_api_key,
-                "embedding_dim": embedding_dim,
-            }
-            if model_name:
-                call_kwargs["model"] = model_name
-            return await raw_func(texts, **call_kwargs)
-        if binding == "lollms":
-            return await raw_func(
-                texts,
-                embed_model=model_name,
-                base_url=settings.embedding_binding_host,
-                api_key=settings.embedding_binding_api_key,
-            )
-        if binding == "aws_bedrock":
-            call_kwargs = {}
-            if model_name:
-                call_kwargs["model"] = model_name
-            return await raw_func(texts, **call_kwargs)
-        raise ValueError(f"Unsupported EMBEDDING_BINDING: {binding}")
+    embed = factory(raw_func, settings, model_name)
 
     return wrap_embedding_func_with_attrs(
         embedding_dim=embedding_dim,
@@ -307,6 +413,24 @@ def _build_embedding_func(settings: MCPSettings) -> EmbeddingFunc:
     )(embed)
 
 
+# QueryParam fields set from _build_query_param's arguments when not None.
+_QUERY_PARAM_OVERRIDES = (
+    "only_need_context",
+    "only_need_prompt",
+    "top_k",
+    "chunk_top_k",
+    "max_entity_tokens",
+    "max_relation_tokens",
+    "max_total_tokens",
+    "hl_keywords",
+    "ll_keywords",
+    "conversation_history",
+    "user_prompt",
+    "enable_rerank",
+    "include_references",
+)
+
+
 def _build_query_param(
     *,
     mode: str,
@@ -325,78 +449,87 @@ def _build_query_param(
     enable_rerank: bool | None,
     include_references: bool | None,
 ) -> QueryParam:
+    args = locals()
+    from lightrag.base import QueryParam
+
     param = QueryParam(mode=mode)
     param.stream = False
-    if only_need_context is not None:
-        param.only_need_context = only_need_context
-    if only_need_prompt is not None:
-        param.only_need_prompt = only_need_prompt
     if response_type:
         param.response_type = response_type
-    if top_k is not None:
-        param.top_k = top_k
-    if chunk_top_k is not None:
-        param.chunk_top_k = chunk_top_k
-    if max_entity_tokens is not None:
-        param.max_entity_tokens = max_entity_tokens
-    if max_relation_tokens is not None:
-        param.max_relation_tokens = max_relation_tokens
-    if max_total_tokens is not None:
-        param.max_total_tokens = max_total_tokens
-    if hl_keywords is not None:
-        param.hl_keywords = hl_keywords
-    if ll_keywords is not None:
-        param.ll_keywords = ll_keywords
-    if conversation_history is not None:
-        param.conversation_history = conversation_history
-    if user_prompt is not None:
-        param.user_prompt = user_prompt
-    if enable_rerank is not None:
-        param.enable_rerank = enable_rerank
-    if include_references is not None:
-        param.include_references = include_references
+    for name in _QUERY_PARAM_OVERRIDES:
+        if args[name] is not None:
+            setattr(param, name, args[name])
     return param
 
 
-_rag: LightRAG | None = None
-_rag_lock = asyncio.Lock()
+async def _init_rag() -> LightRAG:
+    _load_env_once()
+    from lightrag import LightRAG
+    from lightrag.utils import logger
+
+    settings = MCPSettings.from_env()
+    llm_model_func, llm_model_kwargs = _build_llm_model_func(settings)
+    embedding_func = _build_embedding_func(settings)
+    rag = LightRAG(
+        working_dir=settings.working_dir,
+        workspace=settings.workspace,
+        kv_storage=settings.kv_storage,
+        vector_storage=settings.vector_storage,
+        graph_storage=settings.graph_storage,
+        doc_status_storage=settings.doc_status_storage,
+        llm_model_func=llm_model_func,
+        llm_model_kwargs=llm_model_kwargs,
+        llm_model_name=settings.llm_model,
+        embedding_func=embedding_func,
+        default_llm_timeout=settings.llm_timeout,
+    )
+    await rag.initialize_storages()
+    await rag.check_and_migrate_data()
+    logger.info("LightRAG initialized for MCP queries.")
+    return rag
 
 
-async def _get_rag() -> LightRAG:
-    global _rag
-    if _rag is not None:
-        return _rag
-    async with _rag_lock:
-        if _rag is not None:
-            return _rag
-        settings = MCPSettings.from_env()
-        llm_model_func, llm_model_kwargs = _build_llm_model_func(settings)
-        embedding_func = _build_embedding_func(settings)
-        _rag = LightRAG(
-            working_dir=settings.working_dir,
-            workspace=settings.workspace,
-            kv_storage=settings.kv_storage,
-            vector_storage=settings.vector_storage,
-            graph_storage=settings.graph_storage,
-            doc_status_storage=settings.doc_status_storage,
-            llm_model_func=llm_model_func,
-            llm_model_kwargs=llm_model_kwargs,
-            llm_model_name=settings.llm_model,
-            embedding_func=embedding_func,
-            default_llm_timeout=settings.llm_timeout,
-        )
-        await _rag.initialize_storages()
-        await _rag.check_and_migrate_data()
-        logger.info("LightRAG initialized for MCP queries.")
-        return _rag
+_rag_init: asyncio.Task[LightRAG] | None = None
 
 
-MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
-MCP_PORT = int(os.getenv("MCP_PORT", "8000"))
-mcp = FastMCP("LightRAG", host=MCP_HOST, port=MCP_PORT)
+async def _retire_rag(init: asyncio.Task[LightRAG]) -> None:
+    """Release an instance initialized on a previous event loop before replacing it."""
+    from lightrag.utils import logger
+
+    if not init.done() or init.cancelled() or init.exception() is not None:
+        logger.warning("Dropping incomplete LightRAG init from a previous event loop.")
+        return
+    try:
+        await init.result().finalize_storages()
+    except Exception as e:
+        logger.warning(f"Failed to finalize LightRAG from a previous event loop: {e}")
+
+
+async def _get_rag() -> LightRAG:
+    """Return the shared LightRAG instance, initializing it on first use.
+
+    Concurrent first callers all await the same init task; once it has finished,
+    awaiting it returns the cached instance immediately.
+    """
+    global _rag_init
+    # A task is bound to the loop that created it; a new loop (e.g. a fresh
+    # test event loop) gets its own instance instead of a cross-loop await.
+    stale = _rag_init
+    if stale is not None and stale.get_loop() is not asyncio.get_running_loop():
+        _rag_init = None
+        await _retire_rag(stale)
+    if _rag_init is None:
+        _rag_init = asyncio.ensure_future(_init_rag())
+    init = _rag_init
+    try:
+        # Shield so that one cancelled caller does not abort init for the others.
+        return await asyncio.shield(init)
+    except Exception:
+        if init.done() and _rag_init is init:
+            _rag_init = None  # let the next call retry a failed init
+        raise
 
 
-@mcp.tool()
 async def rag_query(
     query: str,
     mode: Literal["local", "global", "hybrid", "naive", "mix", "bypass"] = "mix",
@@ -444,29 +577,26 @@ async def rag_query(
     references = data.get("references", [])
 
     if include_references and include_chunk_content:
-        chunks = data.get("chunks", [])
-        ref_id_to_content: dict[str, list[str]] = {}
-        for chunk in chunks:
+        ref_id_to_content: defaultdict[str, list[str]] = defaultdict(list)
+        for chunk in data.get("chunks", []):
             ref_id = chunk.get("reference_id", "")
             content = chunk.get("content", "")
             if ref_id and content:
-                ref_id_to_content.setdefault(ref_id, []).append(content)
+                ref_id_to_content[ref_id].append(content)
 
-        enriched_references = []
-        for ref in references:
-            ref_copy = dict(ref)
-            ref_id = ref.get("reference_id", "")
-            if ref_id in ref_id_to_content:
-                ref_copy["content"] = ref_id_to_content[ref_id]
-            enriched_references.append(ref_copy)
-        references = enriched_references
+        # Only references that gain content are copied; the rest pass through.
+        references = [
+            {**ref, "content": ref_id_to_content[ref_id]}
+            if (ref_id := ref.get("reference_id", "")) in ref_id_to_content
+            else ref
+            for ref in references
+        ]
 
     if include_references:
         return {"response": response_content, "references": references}
     return {"response": response_content, "references": None}
 
 
-@mcp.tool()
 async def rag_query_data(
     query: str,
     mode: Literal["local", "global", "hybrid", "naive", "mix", "bypass"] = "mix",
@@ -503,7 +633,25 @@ async def rag_query_data(
     return await rag.aquery_data(query, param=param)
 
 
+def _create_mcp() -> FastMCP:
+    """Build the server and register the query tools once the .env is loaded.
+
+    FastMCP derives its DNS-rebinding protection from the host given to its
+    constructor, so host and port must be passed here rather than set later.
+    """
+    server = FastMCP(
+        "LightRAG",
+        host=os.getenv("MCP_HOST", "127.0.0.1"),
+        port=int(os.getenv("MCP_PORT", "8000")),
+    )
+    server.tool()(rag_query)
+    server.tool()(rag_query_data)
+    return server
+
+
 def _run_mcp() -> None:
+    _load_env_once()
+    mcp = _create_mcp()
     transport = os.getenv("MCP_TRANSPORT", "stdio").lower()
     if transport == "sse":
         mount_path = os.getenv("MCP_MOUNT_PATH")
@@ -1,17 +1,69 @@
 from __future__ import annotations
 
 import json
+import string
 import time
-from typing import Any, Mapping
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
 
 from lightrag.prompt import PROMPTS
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # orjson is an optional speedup for context serialization
+    orjson = None
+
+# Templates are defined eagerly in lightrag.prompt; bind them once at import.
+_KG_CTX = PROMPTS["kg_query_context"]
+_NAIVE_CTX = PROMPTS["naive_query_context"]
+_KG_RESP = PROMPTS["rag_response"]
+_NAIVE_RESP = PROMPTS["naive_rag_response"]
+
+# json.dumps() builds a new encoder whenever non-default options are passed, so
+# share one for the per-record NDJSON lines of the context block.
+# Compact separators match orjson, so the prompt text does not depend on it.
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _to_ndjson(records: Iterable[Mapping[str, Any]]) -> str:
+    """Serialize records as newline-separated JSON objects."""
+    if orjson is not None:
+        # orjson returns UTF-8 bytes without ASCII escaping; decode once at the end.
+        return b"\n".join(map(orjson.dumps, records)).decode("utf-8")
+    return "\n".join(map(_JSON_ENCODER.encode, records))
+
+
+@lru_cache(maxsize=16)
+def _template_parts(template: str) -> tuple[tuple[str, str | None], ...]:
+    """Split a str.format template into (literal, field_name) pairs."""
+    return tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+
+
+def _render_template(template: str, values: Mapping[str, str]) -> str:
+    """Equivalent of ``template.format(**values)`` for plain ``{name}`` fields."""
+    pieces: list[str] = []
+    for literal, field_name in _template_parts(template):
+        pieces.append(literal)
+        if field_name is not None:
+            pieces.append(values[field_name])
+    return "".join(pieces)
+
+
+@lru_cache(maxsize=4096)
+def _format_timestamp(seconds: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(seconds))
+
 
 def _normalize_timestamp(value: Any) -> Any:
     """Convert numeric timestamps to readable strings; leave others as-is."""
     if isinstance(value, (int, float)):
         try:
-            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(value))
+            # Records from one ingestion batch share timestamps; the output only
+            # has second resolution, so key the cache on whole seconds.
+            return _format_timestamp(int(value))
         except (OverflowError, ValueError):
             return value
     return value
@@ -54,65 +106,72 @@ def _render_reference_list(
     Render the Reference Document List section.
 
     If references are missing, fall back to unique (reference_id, file_path) pairs from chunks.
+    ``chunks`` are the shaped records from ``_as_context_chunk``, whose reference_id
+    is already normalized.
     """
     ref_entries: list[tuple[str, str]] = []
 
     for ref in references or []:
         ref_id = str(ref.get("reference_id", "")).strip()
-        file_path = ref.get("file_path", "")
         if ref_id:
-            ref_entries.append((ref_id, file_path))
+            ref_entries.append((ref_id, ref.get("file_path", "")))
 
     if not ref_entries:
-        seen_ids = set()
+        first_seen: dict[str, str] = {}
         for chunk in chunks or []:
-            ref_id = str(chunk.get("reference_id", "")).strip()
-            file_path = chunk.get("file_path", "")
-            if ref_id and ref_id not in seen_ids:
-                seen_ids.add(ref_id)
-                ref_entries.append((ref_id, file_path))
-
-    return "\n".join(f"[{ref_id}] {file_path}" for ref_id, file_path in ref_entries if ref_id)
+            ref_id = chunk.get("reference_id", "")
+            if ref_id:
+                first_seen.setdefault(ref_id, chunk.get("file_path", ""))
+        ref_entries = list(first_seen.items())
 
+    return "\n".join(f"[{ref_id}] {file_path}" for ref_id, file_path in ref_entries)
 
-def build_context_from_retrieval(payload: Mapping[str, Any]) -> str:
-    """
-    Build the LLM-ready context block from a retrieval result.
 
-    Supports two shapes:
-    - Full API response: {"status": "...", "data": {"entities": [...], "relationships": [...], "chunks": [...], "references": [...]} }
-    - Raw data dict: {"entities": [...], "relationships": [...], "chunks": [...], "references": [...]}
-    """
+def _build_context(payload: Mapping[str, Any]) -> tuple[str, bool]:
+    """Return the context block and whether the KG template was used for it."""
     data_section = payload.get("data", payload)
-    entities = [_as_context_entity(e) for e in data_section.get("entities", [])]
-    relationships = [
-        _as_context_relation(r) for r in data_section.get("relationships", [])
+    raw_entities = data_section.get("entities") or []
+    raw_relationships = data_section.get("relationships") or []
+    chunks = [
+        _as_context_chunk(c) for c in data_section.get("chunks", []) if c.get("content")
     ]
-    chunks = [_as_context_chunk(c) for c in data_section.get("chunks", [])]
     references = data_section.get("references", []) or []
 
     # Pick template: use KG template when we have any graph signals, otherwise the naive one.
-    has_graph = bool(entities or relationships)
-    template_key = "kg_query_context" if has_graph else "naive_query_context"
-    template = PROMPTS[template_key]
-
-    entities_str = "\n".join(json.dumps(entity, ensure_ascii=False) for entity in entities)
-    relations_str = "\n".join(
-        json.dumps(relation, ensure_ascii=False) for relation in relationships
-    )
-    text_chunks_str = "\n".join(
-        json.dumps(chunk, ensure_ascii=False)
-        for chunk in chunks
-        if chunk.get("content", "")
-    )
+    has_graph = bool(raw_entities or raw_relationships)
+    if has_graph:
+        template = _KG_CTX
+        entities_str = _to_ndjson(map(_as_context_entity, raw_entities))
+        relations_str = _to_ndjson(map(_as_context_relation, raw_relationships))
+    else:
+        # The naive template has no entity/relation sections to fill.
+        template = _NAIVE_CTX
+        entities_str = relations_str = ""
+    text_chunks_str = _to_ndjson(chunks)
     reference_list_str = _render_reference_list(references, chunks)
 
-    return template.format(
-        entities_str=entities_str,
-        relations_str=relations_str,
-        text_chunks_str=text_chunks_str,
-        reference_list_str=reference_list_str,
+    context = _render_template(
+        template,
+        {
+            "entities_str": entities_str,
+            "relations_str": relations_str,
+            "text_chunks_str": text_chunks_str,
+            "reference_list_str": reference_list_str,
+        },
     )
+    return context, has_graph
+
+
+def build_context_from_retrieval(payload: Mapping[str, Any]) -> str:
+    """
+    Build the LLM-ready context block from a retrieval result.
+
+    Supports two shapes:
+    - Full API response: {"status": "...", "data": {"entities": [...], "relationships": [...], "chunks": [...], "references": [...]} }
+    - Raw data dict: {"entities": [...], "relationships": [...], "chunks": [...], "references": [...]}
+    """
+    context, _ = _build_context(payload)
+    return context
 
 
 def build_prompt_from_retrieval(
@@ -127,15 +186,18 @@ def build_prompt_from_retrieval(
 
     Mirrors the behavior of only_need_prompt=True in the API layer.
     """
-    context_block = build_context_from_retrieval(payload)
-    has_graph = any(payload.get("data", payload).get(k) for k in ("entities", "relationships"))
-    system_template_key = "rag_response" if has_graph else "naive_rag_response"
-    system_template = PROMPTS[system_template_key]
-
-    system_prompt = system_template.format(
-        response_type=response_type,
-        user_prompt=f"\n\n{user_prompt}" if user_prompt else "n/a",
-        context_data=context_block,
+    context_block, has_graph = _build_context(payload)
+    system_template = _KG_RESP if has_graph else _NAIVE_RESP
+
+    system_prompt = _render_template(
+        system_template,
+        {
+            "response_type": response_type,
+            "user_prompt": f"\n\n{user_prompt}" if user_prompt else "n/a",
+            # naive_rag_response names its context field content_data.
+            "context_data": context_block,
+            "content_data": context_block,
+        },
     )
 
-    return "\n\n".join([system_prompt, "---User Query---", user_query])
+    return f"{system_prompt}\n\n---User Query---\n\n{user_query}"
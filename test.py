@@ -3,12 +3,16 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import concurrent.futures
+import hashlib
+import importlib.util
 import json
 import os
+import sqlite3
+import stat
 import sys
 import time
 from functools import partial
+from pathlib import Path
 from typing import Any
 
 from lightrag.api import config as api_config
@@ -19,29 +23,31 @@ from lightrag.llm.binding_options import (
     OllamaLLMOptions,
     OpenAILLMOptions,
 )
-from lightrag.llm.gemini import gemini_complete_if_cache
-from lightrag.llm.lollms import lollms_model_if_cache
-from lightrag.llm.ollama import _ollama_model_if_cache
-from lightrag.llm.openai import (
-    azure_openai_complete_if_cache,
-    openai_complete_if_cache,
-)
 from lightrag.utils import use_llm_func_with_cache
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # orjson is an optional speedup for large history files
+    orjson = None
 
-def _load_env_config() -> argparse.Namespace:
-    saved_argv = sys.argv[:]
-    sys.argv = [saved_argv[0]]
-    try:
-        return api_config.get_config()
-    finally:
-        sys.argv = saved_argv
+
+def _read_file_bytes(path: str) -> bytes:
+    """Read a whole (small) file with a single read on the raw descriptor.
+
+    Pipes, /dev/stdin and <(...) paths report no size, so they are read to EOF.
+    """
+    with open(path, "rb", buffering=0) as f:
+        info = os.fstat(f.fileno())
+        if stat.S_ISREG(info.st_mode) and info.st_size:
+            return os.read(f.fileno(), info.st_size)
+        return f.readall()
 
 
 def _read_text_arg(value: str | None, path: str | None) -> str:
     if path:
-        with open(path, "r", encoding="utf-8") as handle:
-            return handle.read()
+        text = _read_file_bytes(path).decode("utf-8")
+        # Match text-mode reads, which translate \r\n and \r to \n.
+        return text.replace("\r\n", "\n").replace("\r", "\n")
     if value is not None:
         return value
     if not sys.stdin.isatty():
@@ -49,24 +55,148 @@ def _read_text_arg(value: str | None, path: str | None) -> str:
     raise ValueError("Missing prompt input. Use --prompt, --prompt-file, or stdin.")
 
 
+def _json_loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def _read_json_arg(value: str | None, path: str | None) -> Any | None:
     if path:
-        with open(path, "r", encoding="utf-8") as handle:
-            return json.load(handle)
+        return _json_loads(_read_file_bytes(path))
     if value is None:
         return None
-    return json.loads(value)
+    return _json_loads(value)
 
 
 def _filter_options(options: dict[str, Any]) -> dict[str, Any]:
-    cleaned = {}
-    for key, value in options.items():
-        if value is None:
-            continue
-        if value == [] or value == {}:
-            continue
-        cleaned[key] = value
-    return cleaned
+    return {
+        key: value
+        for key, value in options.items()
+        if value is not None and not (isinstance(value, (list, dict)) and not value)
+    }
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable stand-in for a config value."""
+    if isinstance(value, dict):
+        return dict, tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _config_fingerprint(config_args: argparse.Namespace) -> tuple:
+    items = sorted(vars(config_args).items())
+    return tuple((key, _freeze(value)) for key, value in items)
+
+
+# (options class, config fingerprint) -> filtered options
+_OPTIONS_CACHE: dict[tuple[type, tuple], dict[str, Any]] = {}
+
+
+def _binding_options(
+    options_cls: type, config_args: argparse.Namespace
+) -> dict[str, Any]:
+    """Return the filtered binding options, computed once per distinct config."""
+    key = (options_cls, _config_fingerprint(config_args))
+    options = _OPTIONS_CACHE.get(key)
+    if options is None:
+        options = _OPTIONS_CACHE[key] = _filter_options(
+            options_cls.options_dict(config_args)
+        )
+    return options
+
+
+class _InProcessLLMCache:
+    """In-memory stand-in for the KV storage that use_llm_func_with_cache caches into.
+
+    Keys are derived from prompt, system prompt and history only; binding, model
+    and max_tokens are fixed for a process, so they do not need to be part of them.
+    """
+
+    def __init__(self) -> None:
+        self.global_config = {"enable_llm_cache_for_entity_extract": True}
+        self._data: dict[str, dict[str, Any]] = {}
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        return self._data.get(id)
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        self._data.update(data)
+
+
+class _SQLiteLLMCache:
+    """SQLite-backed variant of _InProcessLLMCache that persists across invocations.
+
+    Since the cache keys do not cover binding, host, model or max_tokens, stored
+    keys are prefixed with a digest of those so different setups never share entries.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        binding: str,
+        host: str | None,
+        model: str,
+        max_tokens: int | None,
+    ):
+        self.global_config = {"enable_llm_cache_for_entity_extract": True}
+        setup = json.dumps([binding, host, model, max_tokens]).encode("utf-8")
+        self._prefix = hashlib.blake2b(setup, digest_size=8).hexdigest() + ":"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT)"
+        )
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        row = self._conn.execute(
+            "SELECT value FROM llm_cache WHERE key = ?", (self._prefix + id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)",
+                [
+                    (self._prefix + key, json.dumps(value, ensure_ascii=False))
+                    for key, value in data.items()
+                ],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _shared_http_client(concurrency: int) -> Any:
+    """Create one pooled httpx client for every OpenAI call made by this process.
+
+    The OpenAI binding closes its SDK client after each call, which also closes a
+    caller-supplied http client. aclose() is therefore a no-op here and
+    close_shared() performs the real close once all runs are done.
+    """
+    import httpx
+
+    class _SharedAsyncClient(httpx.AsyncClient):
+        async def aclose(self) -> None:
+            return None
+
+        async def close_shared(self) -> None:
+            await super().aclose()
+
+    return _SharedAsyncClient(
+        limits=httpx.Limits(
+            max_keepalive_connections=concurrency, max_connections=concurrency * 2
+        ),
+        http2=importlib.util.find_spec("h2") is not None,
+        follow_redirects=True,
+    )
 
 
 def _build_llm_func(
@@ -76,9 +206,21 @@ def _build_llm_func(
     api_key: str | None,
     timeout: int | None,
     config_args: argparse.Namespace,
+    http_client: Any = None,
 ):
+    # Provider modules pull in their SDKs, so only the selected one is imported.
     if binding in ["openai", "azure_openai"]:
-        openai_options = _filter_options(OpenAILLMOptions.options_dict(config_args))
+        from lightrag.llm.openai import (
+            azure_openai_complete_if_cache,
+            openai_complete_if_cache,
+        )
+
+        openai_options = _binding_options(OpenAILLMOptions, config_args)
+        if http_client is not None:
+            openai_options = {
+                **openai_options,
+                "openai_client_configs": {"http_client": http_client},
+            }
         if binding == "azure_openai":
             return partial(
                 azure_openai_complete_if_cache,
@@ -98,7 +240,9 @@ def _build_llm_func(
         )
 
     if binding == "gemini":
-        gemini_options = _filter_options(GeminiLLMOptions.options_dict(config_args))
+        from lightrag.llm.gemini import gemini_complete_if_cache
+
+        gemini_options = _binding_options(GeminiLLMOptions, config_args)
         generation_config = gemini_options or None
         return partial(
             gemini_complete_if_cache,
@@ -110,7 +254,9 @@ def _build_llm_func(
         )
 
     if binding == "ollama":
-        ollama_options = _filter_options(OllamaLLMOptions.options_dict(config_args))
+        from lightrag.llm.ollama import _ollama_model_if_cache
+
+        ollama_options = _binding_options(OllamaLLMOptions, config_args)
         return partial(
             _ollama_model_if_cache,
             model=model,
@@ -121,6 +267,8 @@ def _build_llm_func(
         )
 
     if binding == "lollms":
+        from lightrag.llm.lollms import lollms_model_if_cache
+
         return partial(
             lollms_model_if_cache,
             model,
@@ -136,46 +284,141 @@ async def _run_once(
     system_prompt: str | None,
     history_messages: list[dict[str, Any]] | None,
     max_tokens: int | None,
+    llm_response_cache: _InProcessLLMCache | _SQLiteLLMCache | None = None,
+    history_cache_key: str | None = None,
 ) -> tuple[str, int]:
-    start = time.monotonic()
+    kwargs: dict[str, Any] = {}
+    if system_prompt is not None:
+        kwargs["system_prompt"] = system_prompt
+    if history_messages is not None:
+        kwargs["history_messages"] = history_messages
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+
+    start = time.perf_counter_ns()
     output, _ = await use_llm_func_with_cache(
         prompt,
         use_llm_func,
-        llm_response_cache=None,
-        system_prompt=system_prompt,
-        max_tokens=max_tokens,
-        history_messages=history_messages,
+        llm_response_cache=llm_response_cache,
         cache_type="test_llm",
+        history_cache_key=history_cache_key,
+        **kwargs,
     )
-    duration_ms = int((time.monotonic() - start) * 1000)
+    duration_ms = (time.perf_counter_ns() - start) // 1_000_000
     return output, duration_ms
 
 
-def _run_once_sync(
+async def _stream_once(
     use_llm_func,
     prompt: str,
     system_prompt: str | None,
     history_messages: list[dict[str, Any]] | None,
     max_tokens: int | None,
 ) -> tuple[str, int]:
-    loop = asyncio.new_event_loop()
+    """Call the LLM with stream=True and echo chunks to stdout as they arrive.
+
+    use_llm_func_with_cache only handles complete string responses, so the
+    binding is called directly and the response cache is not consulted.
+    """
+    kwargs: dict[str, Any] = {}
+    if history_messages:
+        kwargs["history_messages"] = history_messages
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+
+    start = time.perf_counter_ns()
+    response = await use_llm_func(
+        prompt=prompt, system_prompt=system_prompt, stream=True, **kwargs
+    )
+    if isinstance(response, str):
+        # Bindings may still return a complete string, e.g. from their own cache.
+        output = response
+        sys.stdout.write(output)
+    else:
+        parts: list[str] = []
+        async for chunk in response:
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+            parts.append(chunk)
+        output = "".join(parts)
+    sys.stdout.write("\n")
+    duration_ms = (time.perf_counter_ns() - start) // 1_000_000
+    return output, duration_ms
+
+
+async def _run_many(
+    use_llm_func,
+    repeat: int,
+    concurrency: int,
+    prompt: str,
+    system_prompt: str | None,
+    history_messages: list[dict[str, Any]] | None,
+    max_tokens: int | None,
+    llm_response_cache: _InProcessLLMCache | _SQLiteLLMCache | None = None,
+    stream: bool = False,
+    http_client: Any = None,
+    history_cache_key: str | None = None,
+) -> None:
+    """Run the prompt `repeat` times on one event loop, `concurrency` at a time.
+
+    Each result is printed as soon as its run finishes, tagged with its run number.
+    Streamed runs echo their output while it arrives and are run one at a time so
+    that concurrent streams do not interleave.
+    """
+    semaphore = asyncio.Semaphore(1 if stream else concurrency)
+
+    async def bounded_run(run_id: int) -> tuple[int, str, int]:
+        async with semaphore:
+            if stream:
+                output, duration_ms = await _stream_once(
+                    use_llm_func,
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    history_messages=history_messages,
+                    max_tokens=max_tokens,
+                )
+            else:
+                output, duration_ms = await _run_once(
+                    use_llm_func,
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    history_messages=history_messages,
+                    max_tokens=max_tokens,
+                    llm_response_cache=llm_response_cache,
+                    history_cache_key=history_cache_key,
+                )
+        return run_id, output, duration_ms
+
+    tasks: list[asyncio.Task[tuple[int, str, int]]] = []
     try:
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(
-            _run_once(
-                use_llm_func,
-                prompt=prompt,
-                system_prompt=system_prompt,
-                history_messages=history_messages,
-                max_tokens=max_tokens,
-            )
+        if llm_response_cache is not None and not stream:
+            # Every run has the same cache key; let the first one fill the cache
+            # before fanning out, otherwise all concurrent runs miss it.
+            tasks.append(asyncio.create_task(bounded_run(1)))
+            await asyncio.wait(tasks)
+        tasks.extend(
+            asyncio.create_task(bounded_run(idx))
+            for idx in range(len(tasks) + 1, repeat + 1)
         )
+        for next_done in asyncio.as_completed(tasks):
+            run_id, output, duration_ms = await next_done
+            header = f"[run {run_id}/{repeat}] {duration_ms}ms\n"
+            # One write per result; streamed output has already been echoed.
+            sys.stdout.write(header if stream else f"{header}{output}\n")
     finally:
-        loop.close()
-        asyncio.set_event_loop(None)
+        sys.stdout.flush()
+        if http_client is not None:
+            await http_client.close_shared()
 
 
 def main() -> None:
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
+
     parser = argparse.ArgumentParser(description="LightRAG LLM call smoke test")
     parser.add_argument("--prompt", type=str, default=None)
     parser.add_argument("--prompt-file", type=str, default=None)
@@ -190,10 +433,17 @@ def main() -> None:
     parser.add_argument("--host", type=str, default=None)
     parser.add_argument("--api-key", type=str, default=None)
     parser.add_argument("--timeout", type=int, default=None)
-    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.getenv("LLM_TEST_MAX_PARALLEL", (os.cpu_count() or 4) * 5)),
+    )
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--cache-dir", type=str, default=None)
+    parser.add_argument("--stream", action="store_true")
     args = parser.parse_args()
 
-    config_args = _load_env_config()
+    config_args = api_config.get_config_from_env()
     binding = args.binding or os.getenv("LLM_BINDING") or config_args.llm_binding
     model = args.model or os.getenv("LLM_MODEL") or config_args.llm_model
     host = args.host or os.getenv("LLM_BINDING_HOST") or get_default_host(binding)
@@ -208,6 +458,14 @@ def main() -> None:
         if system_prompt == "":
             system_prompt = None
     history_messages = _read_json_arg(args.history_json, args.history_file)
+    if not history_messages:
+        history_messages = None
+
+    concurrency = max(1, args.threads)
+    # Only the OpenAI binding accepts a caller-supplied http client.
+    http_client = None
+    if binding in ["openai", "azure_openai"]:
+        http_client = _shared_http_client(concurrency)
 
     use_llm_func = _build_llm_func(
         binding=binding,
@@ -216,41 +474,47 @@ def main() -> None:
         api_key=api_key,
         timeout=timeout_value,
         config_args=config_args,
+        http_client=http_client,
     )
 
-    threads = max(1, args.threads)
-    if threads == 1 or args.repeat == 1:
-        for idx in range(args.repeat):
-            output, duration_ms = _run_once_sync(
+    # Off by default: repeats are usually meant to measure the LLM, not the cache.
+    llm_response_cache: _InProcessLLMCache | _SQLiteLLMCache | None = None
+    if args.cache_dir:
+        llm_response_cache = _SQLiteLLMCache(
+            Path(args.cache_dir).expanduser() / "llm_cache.sqlite",
+            binding=binding,
+            host=host,
+            model=model,
+            max_tokens=args.max_tokens,
+        )
+    elif args.cache:
+        llm_response_cache = _InProcessLLMCache()
+
+    # Digest the history once rather than letting every cached run re-serialize it.
+    history_cache_key = None
+    if llm_response_cache is not None and history_messages:
+        serialized = json.dumps(history_messages, ensure_ascii=False, sort_keys=True)
+        history_cache_key = hashlib.blake2b(serialized.encode("utf-8")).hexdigest()
+
+    try:
+        asyncio.run(
+            _run_many(
                 use_llm_func,
+                repeat=args.repeat,
+                concurrency=concurrency,
                 prompt=prompt,
                 system_prompt=system_prompt,
                 history_messages=history_messages,
                 max_tokens=args.max_tokens,
+                llm_response_cache=llm_response_cache,
+                stream=args.stream,
+                http_client=http_client,
+                history_cache_key=history_cache_key,
             )
-            print(f"[run {idx + 1}/{args.repeat}] {duration_ms}ms")
-            print(output)
-        return
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
-        futures = {}
-        for idx in range(args.repeat):
-            futures[
-                executor.submit(
-                    _run_once_sync,
-                    use_llm_func,
-                    prompt,
-                    system_prompt,
-                    history_messages,
-                    args.max_tokens,
-                )
-            ] = idx + 1
-
-        for future in concurrent.futures.as_completed(futures):
-            run_id = futures[future]
-            output, duration_ms = future.result()
-            print(f"[run {run_id}/{args.repeat}] {duration_ms}ms")
-            print(output)
+        )
+    finally:
+        if isinstance(llm_response_cache, _SQLiteLLMCache):
+            llm_response_cache.close()
 
 
 if __name__ == "__main__":
@@ -489,6 +489,7 @@ async def test_graph_batch_operations(storage):
     3. Use edge_degrees_batch to get degrees of multiple edges in batch.
     4. Use get_edges_batch to get properties of multiple edges in batch.
     5. Use get_nodes_edges_batch to get all edges of multiple nodes in batch.
+    6. Use upsert_nodes_batch / upsert_edges_batch to insert nodes and edges in batch.
     """
     try:
         chunk1_id = "1"
@@ -826,6 +827,46 @@ async def test_graph_batch_operations(storage):
             "Undirected graph property verification successful: batch-retrieved node edges include all relevant edges (regardless of direction)"
         )
 
+        # 7. Test upsert_nodes_batch / upsert_edges_batch
+        print("== Testing upsert_nodes_batch and upsert_edges_batch")
+        batch_node_ids = ["Batch Node A", "Batch Node B"]
+        await storage.upsert_nodes_batch(
+            [
+                (
+                    node_id,
+                    {
+                        "entity_id": node_id,
+                        "description": f"{node_id} inserted in batch",
+                        "entity_type": "Test",
+                    },
+                )
+                for node_id in batch_node_ids
+            ]
+        )
+        batch_edge_data = {
+            "relationship": "batch link",
+            "weight": 1.0,
+            "description": "Edge inserted in batch",
+        }
+        await storage.upsert_edges_batch(
+            [(batch_node_ids[0], batch_node_ids[1], batch_edge_data)]
+        )
+
+        batch_nodes = await storage.get_nodes_batch(batch_node_ids)
+        for node_id in batch_node_ids:
+            assert node_id in batch_nodes, f"Node {node_id} missing after batch upsert"
+            assert (
+                batch_nodes[node_id].get("description")
+                == f"{node_id} inserted in batch"
+            ), f"Node {node_id} description mismatch after batch upsert"
+
+        batch_edge = await storage.get_edge(batch_node_ids[1], batch_node_ids[0])
+        assert batch_edge is not None, "Edge missing after batch upsert"
+        assert (
+            batch_edge.get("relationship") == batch_edge_data["relationship"]
+        ), "Edge relationship mismatch after batch upsert"
+        print("Batch upsert verification successful")
+
         print("\nBatch operations tests completed.")
         return True
 
@@ -0,0 +1,101 @@
+"""
+Unit tests for the streaming GraphML reader of the PostgreSQL migration tool.
+
+_iter_graphml replaces nx.read_graphml with its own <key>/<data> handling, so
+these tests write graphs with nx.write_graphml and check that both readers
+produce the same node and edge attributes.
+"""
+
+import pytest
+
+# Mark all tests as offline (no external dependencies)
+pytestmark = pytest.mark.offline
+
+nx = pytest.importorskip("networkx")
+pytest.importorskip("lxml")
+
+
+def _read_both(path):
+    from lightrag.tools.migrate_rag_storage_to_postgres import _iter_graphml
+
+    nodes, edges = {}, {}
+    for source, target, props in _iter_graphml(path):
+        if target is None:
+            nodes[source] = props
+        else:
+            edges[frozenset((source, target))] = props
+
+    expected = nx.read_graphml(path)
+    expected_nodes = dict(expected.nodes(data=True))
+    expected_edges = {
+        frozenset((source, target)): data
+        for source, target, data in expected.edges(data=True)
+    }
+    return (nodes, edges), (expected_nodes, expected_edges)
+
+
+def _sample_graph():
+    graph = nx.Graph()
+    graph.add_node(
+        "Alice",
+        entity_type="person",
+        description="Engineer<SEP>Writes “GraphML”\nacross lines",
+        source_id="chunk-1<SEP>chunk-2",
+        created_at=1700000000,
+        score=0.25,
+        verified=True,
+    )
+    graph.add_node(
+        "Bob",
+        entity_type="person",
+        description="",
+        created_at=1700000001,
+        score=1.5,
+        verified=False,
+    )
+    graph.add_node("Acme & Co", entity_type="organization")
+    graph.add_edge(
+        "Alice",
+        "Bob",
+        weight=2.0,
+        keywords="colleague,friend",
+        description="Work together",
+        created_at=1700000002,
+    )
+    graph.add_edge("Bob", "Acme & Co", weight=1.0, keywords="employer")
+    return graph
+
+
+def test_iter_graphml_matches_networkx(tmp_path):
+    """Typed node and edge attributes match nx.read_graphml."""
+    path = tmp_path / "graph_chunk_entity_relation.graphml"
+    nx.write_graphml(_sample_graph(), path)
+
+    (nodes, edges), (expected_nodes, expected_edges) = _read_both(path)
+
+    assert nodes == expected_nodes
+    assert edges == expected_edges
+    # Values keep their declared types rather than coming back as strings
+    assert nodes["Alice"]["created_at"] == 1700000000
+    assert nodes["Alice"]["score"] == 0.25
+    assert nodes["Alice"]["verified"] is True
+    assert nodes["Bob"]["verified"] is False
+    assert edges[frozenset(("Alice", "Bob"))]["weight"] == 2.0
+
+
+def test_iter_graphml_key_defaults_match_networkx(tmp_path):
+    """<default> values are not applied to elements, like nx.read_graphml."""
+    graph = _sample_graph()
+    graph.graph["node_default"] = {"entity_type": "unknown"}
+    graph.graph["edge_default"] = {"weight": 1.0}
+    graph.add_node("Nameless")
+    graph.add_edge("Alice", "Nameless")
+    path = tmp_path / "graph_with_defaults.graphml"
+    nx.write_graphml(graph, path)
+
+    (nodes, edges), (expected_nodes, expected_edges) = _read_both(path)
+
+    assert nodes == expected_nodes
+    assert edges == expected_edges
+    assert "entity_type" not in nodes["Nameless"]
+    assert "weight" not in edges[frozenset(("Alice", "Nameless"))]
@@ -0,0 +1,112 @@
+"""
+Unit tests for the COPY plan derived from PostgreSQL vector upsert templates.
+
+VectorCopyPlan parses the table name and column list out of SQL_TEMPLATES, so
+these tests pin the result for every vector namespace: an edit to a template
+must keep the COPY merge in step with the row-by-row upsert.
+"""
+
+import re
+
+import pytest
+
+# Mark all tests as offline (no external dependencies)
+pytestmark = pytest.mark.offline
+
+TABLE = "LIGHTRAG_VDB_TEST_model_8d"
+
+EXPECTED_COLUMNS = {
+    "upsert_chunk": [
+        "workspace",
+        "id",
+        "tokens",
+        "chunk_order_index",
+        "full_doc_id",
+        "content",
+        "content_vector",
+        "file_path",
+        "create_time",
+        "update_time",
+    ],
+    "upsert_entity": [
+        "workspace",
+        "id",
+        "entity_name",
+        "content",
+        "content_vector",
+        "chunk_ids",
+        "file_path",
+        "create_time",
+        "update_time",
+    ],
+    "upsert_relationship": [
+        "workspace",
+        "id",
+        "source_id",
+        "target_id",
+        "content",
+        "content_vector",
+        "chunk_ids",
+        "file_path",
+        "create_time",
+        "update_time",
+    ],
+}
+
+
+def _plan(template: str):
+    from lightrag.kg.postgres_impl import SQL_TEMPLATES, VectorCopyPlan
+
+    return VectorCopyPlan.from_upsert_sql(
+        SQL_TEMPLATES[template].format(table_name=TABLE)
+    )
+
+
+def _upsert_update_columns(template: str) -> set[str]:
+    """Columns assigned in the template's own ON CONFLICT ... SET clause."""
+    from lightrag.kg.postgres_impl import SQL_TEMPLATES
+
+    set_clause = SQL_TEMPLATES[template].split("DO UPDATE", 1)[1]
+    return set(re.findall(r"(\w+)\s*=\s*EXCLUDED\.", set_clause))
+
+
+@pytest.mark.parametrize("template", sorted(EXPECTED_COLUMNS))
+def test_copy_plan_columns(template):
+    """The COPY columns match the upsert template's column list in order."""
+    plan = _plan(template)
+
+    assert plan.table_name == TABLE
+    assert plan.columns == EXPECTED_COLUMNS[template]
+
+
+@pytest.mark.parametrize("template", sorted(EXPECTED_COLUMNS))
+def test_copy_plan_merge_sql(template):
+    """The merge SQL inserts every column and updates the upsert's SET columns."""
+    plan = _plan(template)
+    column_list = ", ".join(EXPECTED_COLUMNS[template])
+    update_columns = [
+        col
+        for col in EXPECTED_COLUMNS[template]
+        if col not in ("workspace", "id", "create_time")
+    ]
+
+    assert plan.create_staging_sql == (
+        "CREATE TEMP TABLE lightrag_vdb_copy_staging "
+        f"(LIKE {TABLE} INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    assert plan.merge_sql == (
+        f"INSERT INTO {TABLE} ({column_list})\n"
+        f"SELECT {column_list} FROM lightrag_vdb_copy_staging\n"
+        "ON CONFLICT (workspace,id) DO UPDATE SET\n"
+        + ",\n".join(f"{col}=EXCLUDED.{col}" for col in update_columns)
+    )
+    # Same conflict behavior as the executemany upsert it replaces
+    assert set(update_columns) == _upsert_update_columns(template)
+
+
+def test_copy_plan_rejects_unparsable_sql():
+    """SQL without an INSERT INTO column list fails loudly instead of guessing."""
+    from lightrag.kg.postgres_impl import VectorCopyPlan
+
+    with pytest.raises(ValueError):
+        VectorCopyPlan.from_upsert_sql("UPDATE some_table SET x = 1")
@@ -0,0 +1,160 @@
+"""
+Unit tests for building LLM prompts from retrieval results (postprocess.py).
+
+postprocess renders its templates with pre-split parts instead of str.format;
+these tests check the output stays identical to str.format for both the KG
+and the naive templates.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.prompt import PROMPTS  # noqa: E402
+import postprocess  # noqa: E402
+
+# Mark all tests as offline (no external dependencies)
+pytestmark = pytest.mark.offline
+
+QUERY = "Who works with Alice?"
+
+KG_PAYLOAD = {
+    "status": "success",
+    "data": {
+        "entities": [
+            {
+                "entity_name": "Alice",
+                "entity_type": "person",
+                "description": "Engineer who writes {braces} and “quotes”",
+                "created_at": 1700000000,
+                "file_path": "team.md",
+            }
+        ],
+        "relationships": [
+            {
+                "src_id": "Alice",
+                "tgt_id": "Bob",
+                "description": "Work together",
+                "created_at": 1700000001.5,
+                "file_path": "team.md",
+            }
+        ],
+        "chunks": [
+            {"reference_id": "1", "content": "Alice and Bob share a desk."},
+            {"reference_id": "2", "content": ""},
+        ],
+        "references": [{"reference_id": "1", "file_path": "team.md"}],
+    },
+}
+
+NAIVE_PAYLOAD = {
+    "entities": [],
+    "relationships": [],
+    "chunks": [
+        {
+            "reference_id": " 1 ",
+            "content": "Alice joined in 2020.",
+            "file_path": "a.md",
+        },
+        {"reference_id": "2", "content": "Bob joined in 2021.", "file_path": "b.md"},
+        {"reference_id": "1", "content": "Alice leads the team.", "file_path": "a.md"},
+    ],
+    "references": [],
+}
+
+
+def _format_context(payload):
+    """Reference context block built with str.format, as before the change."""
+    data = payload.get("data", payload)
+    chunks = [
+        postprocess._as_context_chunk(c)
+        for c in data.get("chunks", [])
+        if c.get("content")
+    ]
+    values = {
+        "text_chunks_str": postprocess._to_ndjson(chunks),
+        "reference_list_str": postprocess._render_reference_list(
+            data.get("references", []), chunks
+        ),
+    }
+    if data.get("entities") or data.get("relationships"):
+        values["entities_str"] = postprocess._to_ndjson(
+            map(postprocess._as_context_entity, data["entities"])
+        )
+        values["relations_str"] = postprocess._to_ndjson(
+            map(postprocess._as_context_relation, data["relationships"])
+        )
+        return PROMPTS["kg_query_context"].format(**values)
+    return PROMPTS["naive_query_context"].format(**values)
+
+
+@pytest.mark.parametrize(
+    "template",
+    ["kg_query_context", "naive_query_context", "rag_response", "naive_rag_response"],
+)
+def test_render_template_matches_str_format(template):
+    """_render_template gives the same text as str.format for every template."""
+    fields = {
+        "entities_str": '{"entity":"A"}',
+        "relations_str": '{"entity1":"A","entity2":"B"}',
+        "text_chunks_str": '{"reference_id":"1","content":"x {y} z"}',
+        "reference_list_str": "[1] a.md",
+        "response_type": "Bullet Points",
+        "user_prompt": "n/a",
+        "context_data": "CONTEXT",
+        "content_data": "CONTEXT",
+    }
+
+    text = PROMPTS[template]
+
+    assert postprocess._render_template(text, fields) == text.format(**fields)
+
+
+def test_kg_prompt_matches_str_format():
+    """KG payloads use rag_response and render exactly like str.format."""
+    context = _format_context(KG_PAYLOAD)
+    expected = PROMPTS["rag_response"].format(
+        response_type="Bullet Points",
+        user_prompt="\n\nAnswer briefly.",
+        context_data=context,
+    )
+
+    assert postprocess.build_context_from_retrieval(KG_PAYLOAD) == context
+    assert (
+        postprocess.build_prompt_from_retrieval(
+            KG_PAYLOAD,
+            QUERY,
+            response_type="Bullet Points",
+            user_prompt="Answer briefly.",
+        )
+        == f"{expected}\n\n---User Query---\n\n{QUERY}"
+    )
+
+
+def test_naive_prompt_matches_str_format():
+    """Chunk-only payloads fill naive_rag_response's content_data field."""
+    context = _format_context(NAIVE_PAYLOAD)
+    expected = PROMPTS["naive_rag_response"].format(
+        response_type="Multiple Paragraphs",
+        user_prompt="n/a",
+        content_data=context,
+    )
+
+    assert postprocess.build_context_from_retrieval(NAIVE_PAYLOAD) == context
+    assert postprocess.build_prompt_from_retrieval(NAIVE_PAYLOAD, QUERY) == (
+        f"{expected}\n\n---User Query---\n\n{QUERY}"
+    )
+
+
+def test_naive_template_needs_content_data():
+    """The naive template raised KeyError when only context_data was passed."""
+    with pytest.raises(KeyError):
+        PROMPTS["naive_rag_response"].format(
+            response_type="Multiple Paragraphs",
+            user_prompt="n/a",
+            context_data="CONTEXT",
+        )